@@ -3,7 +3,7 @@
 
 - Fast replies: Groq (Llama 3) for short/simple queries
 - Smart/long-context: Google Gemini (Gemini 1.5 Flash) for complex or long-history queries
-- Long-term memory: ChromaDB (local, DuckDB+Parquet) + sentence-transformers
+- Long-term memory: ChromaDB (local, SQLite + HNSW) or FAISS + sentence-transformers
 - Interface: SpeechRecognition (mic) + pyttsx3 (offline TTS)
 
 USAGE
@@ -13,11 +13,20 @@ USAGE
 
 from __future__ import annotations
 
+import atexit
+import collections
+import faulthandler
+import functools
+import json
 import logging
 import os
+import queue
+import re
 import threading
 import time
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
 
 # Voice/Audio
 try:
@@ -33,11 +42,25 @@ except Exception:
 # Local vector database
 try:
     import chromadb
-    from chromadb.config import Settings
-    from chromadb.utils import embedding_functions
 except Exception:
     chromadb = None
 
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Optional FAISS backend (JARVIS_VECTOR_BACKEND=faiss)
+try:
+    import faiss
+except Exception:
+    faiss = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except Exception:
+    SentenceTransformer = None
+
 # Optional model clients (guarded imports)
 try:
     import groq
@@ -56,6 +79,25 @@ except Exception:
 DB_DIR = os.getenv("JARVIS_CHROMA_DIR", "./.chroma")
 COLLECTION_NAME = os.getenv("JARVIS_COLLECTION", "jarvis_memories")
 TOP_K = int(os.getenv("JARVIS_TOP_K", "4"))
+# Optional MMR rerank of retrieved memories: 0..1 weight on relevance vs. novelty
+MMR_LAMBDA = (
+    float(os.environ["JARVIS_MMR_LAMBDA"]) if os.getenv("JARVIS_MMR_LAMBDA") else None
+)
+# "chroma" (default) or "faiss"
+VECTOR_BACKEND = os.getenv("JARVIS_VECTOR_BACKEND", "chroma").lower()
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+# HNSW index tuning for the Chroma collection (sized for a personal, sub-10k corpus)
+HNSW_M = int(os.getenv("JARVIS_HNSW_M", "8"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("JARVIS_HNSW_EFC", "100"))
+HNSW_EF_SEARCH = int(os.getenv("JARVIS_HNSW_EF", "32"))
+# Dynamic int8 quantization of the embedding model when running on CPU
+QUANTIZE = os.getenv("JARVIS_QUANTIZE") == "1"
+# Short "groq" turns below this many characters skip memory recall and storage
+MEM_MIN_LEN = int(os.getenv("JARVIS_MEM_MIN_LEN", "60"))
+# Max documents per Chroma `add` call (Chroma rejects very large batches)
+CHROMA_MAX_BATCH = int(os.getenv("JARVIS_CHROMA_MAX_BATCH", "2000"))
+# Seconds between background persists of pending memory writes
+PERSIST_INTERVAL = float(os.getenv("JARVIS_PERSIST_INTERVAL", "10"))
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -75,32 +117,94 @@ logger = logging.getLogger("jarvis")
 # -------------------------
 # TTS
 # -------------------------
-_tts = None
-if pyttsx3:
-    try:
-        _tts = pyttsx3.init()
-    except Exception:
-        _tts = None
+# Texts longer than this are queued sentence by sentence so speech starts sooner
+SENTENCE_SPLIT_MIN = 120
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+_tts_queue: "queue.Queue[str]" = queue.Queue()
+_tts_thread: threading.Thread | None = None
+_tts_lock = threading.Lock()
+
+
+def _tts_worker() -> None:
+    """Own the pyttsx3 engine and speak queued text in order.
+
+    The engine is created here because some drivers (SAPI5) must be driven from
+    the thread that initialized them.
+    """
+    engine = None
+    if pyttsx3:
+        try:
+            engine = pyttsx3.init()
+        except Exception:
+            logger.exception("TTS init failed; printing instead")
+    while True:
+        text = _tts_queue.get()
+        try:
+            if engine:
+                try:
+                    engine.say(text)
+                    engine.runAndWait()
+                except Exception:
+                    logger.exception("TTS failed, printing instead")
+                    print("Jarvis:", text)
+            else:
+                print("Jarvis:", text)
+        finally:
+            _tts_queue.task_done()
+
+
+def _sentence_split(text: str) -> List[str]:
+    return [part for part in _SENTENCE_SPLIT_RE.split(text.strip()) if part]
 
 
 def speak(text: str) -> None:
-    """Speak text in a background thread (or print as fallback). Respects NO_AUDIO flag."""
+    """Queue text for the TTS worker (or print as fallback). Respects NO_AUDIO flag."""
+    global _tts_thread
     if NO_AUDIO:
-        logger.debug("NO_AUDIO set; skipping speak: %s", text)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("NO_AUDIO set; skipping speak: %s", text)
         return
+    with _tts_lock:
+        if _tts_thread is None:
+            _tts_thread = threading.Thread(target=_tts_worker, daemon=True)
+            _tts_thread.start()
+    if len(text) > SENTENCE_SPLIT_MIN:
+        for sentence in _sentence_split(text):
+            _tts_queue.put(sentence)
+    else:
+        _tts_queue.put(text)
 
-    def _do():
-        if _tts:
-            try:
-                _tts.say(text)
-                _tts.runAndWait()
-            except Exception:
-                logger.exception("TTS failed, printing instead")
-                print("Jarvis:", text)
-        else:
-            print("Jarvis:", text)
 
-    threading.Thread(target=_do, daemon=True).start()
+class _SentenceStream:
+    """Buffer streamed text and pass each completed sentence to `emit`."""
+
+    def __init__(self, emit):
+        self._emit = emit
+        self._buf = ""
+        self.started = False
+
+    def feed(self, text: str) -> None:
+        self._buf += text
+        *done, self._buf = _SENTENCE_SPLIT_RE.split(self._buf)
+        for sentence in done:
+            self._send(sentence)
+
+    def close(self) -> None:
+        self._send(self._buf)
+        self._buf = ""
+
+    def _send(self, sentence: str) -> None:
+        sentence = sentence.strip()
+        if sentence:
+            self.started = True
+            self._emit(sentence)
+
+
+def speak_flush() -> None:
+    """Block until everything queued via speak() has been spoken."""
+    if _tts_thread is not None:
+        _tts_queue.join()
 
 
 # -------------------------
@@ -153,19 +257,61 @@ try:
 except Exception:
     _POCKETSPHINX_AVAILABLE = False
 
+# webrtcvad gates the online STT fallback so it only runs when someone speaks (optional)
+try:
+    import webrtcvad
+except Exception:
+    webrtcvad = None
+
 WAKE_WORD = os.getenv("JARVIS_WAKE_WORD", "jarvis").lower()
 
+VAD_RATE = 16000
+VAD_FRAME_MS = 20
+VAD_AGGRESSIVENESS = int(os.getenv("JARVIS_VAD_AGGRESSIVENESS", "2"))
+# trailing silent frames that end an utterance, and the longest utterance sent to STT
+VAD_END_FRAMES = 10
+VAD_MAX_SECONDS = 3.0
+
 
+_pyaudio_instance = None
+_pyaudio_lock = threading.Lock()
+
+
+def _get_pyaudio():
+    """Return the process-wide PyAudio instance, initializing PortAudio on first use."""
+    global _pyaudio_instance
+    with _pyaudio_lock:
+        if _pyaudio_instance is None:
+            import pyaudio
+
+            _pyaudio_instance = pyaudio.PyAudio()
+        return _pyaudio_instance
+
+
+def _terminate_pyaudio() -> None:
+    global _pyaudio_instance
+    with _pyaudio_lock:
+        if _pyaudio_instance is not None:
+            try:
+                _pyaudio_instance.terminate()
+            except Exception:
+                pass
+            _pyaudio_instance = None
+
+
+atexit.register(_terminate_pyaudio)
+
+
+@functools.lru_cache(maxsize=1)
 def get_available_mics() -> List[Dict]:
     """Return a list of available input audio devices as dicts: {'index': i, 'name': name}.
 
+    The result is cached (treat it as read-only); call invalidate_mic_cache() to rescan.
     If PyAudio is unavailable, returns an empty list.
     """
     out: List[Dict] = []
     try:
-        import pyaudio
-
-        p = pyaudio.PyAudio()
+        p = _get_pyaudio()
         count = p.get_device_count()
         for i in range(count):
             try:
@@ -175,12 +321,21 @@ def get_available_mics() -> List[Dict]:
                     out.append({"index": i, "name": info.get("name")})
             except Exception:
                 continue
-        p.terminate()
     except Exception:
         logger.debug("PyAudio not available or failed to enumerate devices")
     return out
 
 
+def invalidate_mic_cache() -> None:
+    """Forget the cached device list and PyAudio instance so the next call rescans.
+
+    PortAudio only sees hot-plugged devices after re-initialization, so the
+    shared instance is dropped as well.
+    """
+    get_available_mics.cache_clear()
+    _terminate_pyaudio()
+
+
 def check_microphone() -> bool:
     """Check for at least one audio input device (PyAudio) or the configured JARVIS_MIC_NAME.
 
@@ -197,11 +352,13 @@ def check_microphone() -> bool:
             if cfg.lower() in (d["name"] or "").lower():
                 logger.debug("Configured Jarvis mic '%s' found as device: %s", cfg, d)
                 return True
-        logger.warning(
-            "Configured Jarvis mic '%s' not found among devices: %s",
-            cfg,
-            [d["name"] for d in mics],
-        )
+        # only build the device-name list if the warning will be emitted
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning(
+                "Configured Jarvis mic '%s' not found among devices: %s",
+                cfg,
+                [d["name"] for d in mics],
+            )
         return False
     return True
 
@@ -254,6 +411,85 @@ def check_camera() -> bool:
         return False
 
 
+def _vad_wakeword_loop(stop_event, callback_on_wake) -> bool:
+    """Wake-word loop that only calls STT once the local VAD has seen speech.
+
+    Audio frames arrive through a PyAudio callback queue, so the loop blocks
+    instead of polling. Returns False if VAD capture could not be started.
+    """
+    try:
+        import pyaudio
+
+        frames: "queue.Queue[bytes]" = queue.Queue()
+        frame_len = VAD_RATE * VAD_FRAME_MS // 1000
+
+        def _on_audio(data, frame_count, time_info, status):
+            frames.put(data)
+            return (None, pyaudio.paContinue)
+
+        vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+        stream = _get_pyaudio().open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=VAD_RATE,
+            input=True,
+            frames_per_buffer=frame_len,
+            stream_callback=_on_audio,
+        )
+    except Exception:
+        logger.debug("VAD capture unavailable", exc_info=True)
+        return False
+
+    logger.info("Wake-word fallback using VAD-gated recognition")
+    max_bytes = int(VAD_RATE * 2 * VAD_MAX_SECONDS)
+    voiced = bytearray()
+    silence = 0
+    try:
+        while not stop_event.is_set():
+            try:
+                frame = frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if vad.is_speech(frame, VAD_RATE):
+                voiced += frame
+                silence = 0
+            elif voiced:
+                voiced += frame
+                silence += 1
+            else:
+                continue
+            if silence < VAD_END_FRAMES and len(voiced) < max_bytes:
+                continue
+            audio = sr.AudioData(bytes(voiced), VAD_RATE, 2)
+            voiced.clear()
+            silence = 0
+            try:
+                text = _recognizer.recognize_google(audio)
+            except Exception:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Wake-word VAD recognition error", exc_info=True)
+                continue
+            if WAKE_WORD in text.lower():
+                logger.info("Wake word detected (vad) in: %s", text)
+                # release the device while the command records through its own
+                # stream; exclusive/hw devices can't be opened twice
+                stream.stop_stream()
+                try:
+                    callback_on_wake()
+                finally:
+                    # drop audio queued before capture paused, then resume
+                    while not frames.empty():
+                        frames.get_nowait()
+                    stream.start_stream()
+    finally:
+        try:
+            stream.stop_stream()
+            stream.close()
+        except Exception:
+            pass
+    return True
+
+
 def _wakeword_loop(stop_event, callback_on_wake):
     """Continuously listen for the configured wake word, then invoke callback_on_wake()."""
     logger.info("Wake-word listener started (wake word: '%s')", WAKE_WORD)
@@ -273,6 +509,10 @@ def _wakeword_loop(stop_event, callback_on_wake):
         except Exception:
             logger.exception("pocketsphinx wake loop failed; falling back to polling")
 
+    if webrtcvad is not None and _recognizer is not None:
+        if _vad_wakeword_loop(stop_event, callback_on_wake):
+            return
+
     # Fallback: periodic short recognition using the existing `listen()` function
     while not stop_event.is_set():
         try:
@@ -282,7 +522,8 @@ def _wakeword_loop(stop_event, callback_on_wake):
                 logger.info("Wake word detected (fallback) in: %s", text)
                 callback_on_wake()
         except Exception:
-            logger.debug("Wake-word fallback listen error", exc_info=True)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Wake-word fallback listen error", exc_info=True)
         finally:
             # Small sleep to avoid busy loop
             time.sleep(0.3)
@@ -304,23 +545,198 @@ def start_wakeword_background(callback_on_wake) -> "threading.Event":
 
 _chroma_client = None
 _memory_col = None
+_embed_model = None
+
+
+def _embed(texts: List[str]) -> List[List[float]] | None:
+    """Encode `texts` with the shared SentenceTransformer; None if it isn't loaded."""
+    if _embed_model is None:
+        return None
+    return _embed_model.encode(
+        texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True
+    ).tolist()
+
+
+class _SharedEmbedding:
+    """Chroma embedding function backed by the module's single model instance."""
+
+    def __call__(self, input):
+        return _embed(list(input))
+
+
+class _FaissMemoryStore:
+    """Small Chroma-compatible collection backed by a FAISS IndexFlatIP.
+
+    Embeddings are normalized, so inner product equals cosine similarity. The
+    store also plays the role of the client: `persist()` saves the index and
+    the parallel (id, text, meta) records under `db_dir`.
+    """
+
+    def __init__(self, db_dir: str, dim: int):
+        self._dir = Path(db_dir)
+        self._index_path = self._dir / "faiss.index"
+        self._records_path = self._dir / "faiss_records.json"
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if self._index_path.exists() and self._records_path.exists():
+            self._index = faiss.read_index(str(self._index_path))
+            records = json.loads(self._records_path.read_text(encoding="utf-8"))
+        else:
+            self._index = faiss.IndexFlatIP(dim)
+            records = {"ids": [], "documents": [], "metadatas": []}
+        self._ids: List[str] = records["ids"]
+        self._docs: List[str] = records["documents"]
+        self._metas: List[Dict] = records["metadatas"]
+        n = self._index.ntotal
+        if len(self._ids) > n:
+            # records are saved first, so an interrupted persist leaves extra
+            # trailing records; the index still matches their prefix
+            logger.warning(
+                "FAISS records ahead of index (%d > %d); dropping the extras",
+                len(self._ids),
+                n,
+            )
+            del self._ids[n:], self._docs[n:], self._metas[n:]
+        elif len(self._ids) < n:
+            raise ValueError(
+                f"FAISS index has {n} vectors but only {len(self._ids)} records"
+            )
+
+    def add(self, ids, documents, metadatas, embeddings=None):
+        if embeddings is None:
+            embeddings = _embed(list(documents))
+        vecs = np.asarray(embeddings, dtype="float32")
+        with self._lock:
+            self._index.add(vecs)
+            self._ids.extend(ids)
+            self._docs.extend(documents)
+            self._metas.extend(metadatas)
+
+    def query(
+        self, query_embeddings=None, n_results=TOP_K, query_texts=None, include=None
+    ):
+        if query_embeddings is None:
+            query_embeddings = _embed(list(query_texts))
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        want_embeddings = include is not None and "embeddings" in include
+        if want_embeddings:
+            out["embeddings"] = []
+        with self._lock:
+            n = min(n_results, self._index.ntotal)
+            if n == 0:
+                for key in out:
+                    out[key] = [[] for _ in query_embeddings]
+                return out
+            sims, rows = self._index.search(
+                np.asarray(query_embeddings, dtype="float32"), n
+            )
+            for sim_row, idx_row in zip(sims, rows):
+                hits = [i for i in idx_row if i >= 0]
+                out["ids"].append([self._ids[i] for i in hits])
+                out["documents"].append([self._docs[i] for i in hits])
+                out["metadatas"].append([self._metas[i] for i in hits])
+                out["distances"].append([1.0 - float(x) for x in sim_row[: len(hits)]])
+                if want_embeddings:
+                    out["embeddings"].append(
+                        [self._index.reconstruct(int(i)) for i in hits]
+                    )
+        return out
+
+    def get(self, limit=None, offset=0, include=None):
+        end = None if limit is None else offset + limit
+        with self._lock:
+            return {
+                "ids": self._ids[offset:end],
+                "documents": self._docs[offset:end],
+                "metadatas": self._metas[offset:end],
+            }
+
+    def count(self) -> int:
+        return self._index.ntotal
+
+    def persist(self) -> None:
+        # snapshot under the lock, write to disk outside it so adds aren't blocked
+        with self._lock:
+            blob = faiss.serialize_index(self._index)
+            records = json.dumps(
+                {"ids": self._ids, "documents": self._docs, "metadatas": self._metas},
+                ensure_ascii=False,
+            )
+        self._dir.mkdir(parents=True, exist_ok=True)
+        # each file is swapped in whole; records go first so a crash between
+        # the two replaces only leaves records the next load can trim
+        with self._save_lock:
+            _replace_file(self._records_path, records.encode("utf-8"))
+            _replace_file(self._index_path, blob.tobytes())
+
+
+def _replace_file(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _load_embed_model() -> None:
+    """Load the shared embedding model once: fp16 on CUDA, optional int8 on CPU."""
+    global _embed_model
+    if _embed_model is not None:
+        return
+    import torch
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(EMBED_MODEL_NAME, device=device)
+    if device == "cuda":
+        model.half()
+    elif QUANTIZE:
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    logger.debug("Loaded %s on %s", EMBED_MODEL_NAME, device)
+    _embed_model = model
+
+
+def _init_faiss(db_dir: str):
+    if faiss is None or SentenceTransformer is None:
+        logger.info(
+            "faiss or sentence-transformers not installed; skipping memory initialization"
+        )
+        return None, None
+    try:
+        _load_embed_model()
+        store = _FaissMemoryStore(
+            db_dir, _embed_model.get_sentence_embedding_dimension()
+        )
+        logger.debug("Initialized FAISS memory store at %s", db_dir)
+        return store, store
+    except Exception:
+        logger.exception("Failed to init FAISS memory store; memory disabled.")
+        return None, None
 
 
 def init_chroma(db_dir: str | None = None):
-    """Initialize or reinitialize Chroma client with optional `db_dir`. Returns (client, collection) or (None, None)."""
+    """Initialize or reinitialize the memory backend with optional `db_dir`. Returns (client, collection) or (None, None)."""
+    _db = db_dir or DB_DIR
+    if VECTOR_BACKEND == "faiss":
+        return _init_faiss(_db)
     if not chromadb:
         logger.info("ChromaDB not installed; skipping memory initialization")
         return None, None
-    _db = db_dir or DB_DIR
     try:
-        client = chromadb.Client(
-            Settings(chroma_db_impl="duckdb+parquet", persist_directory=_db)
-        )
-        embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        # SQLite + HNSW; writes are persisted by Chroma itself
+        client = chromadb.PersistentClient(path=_db)
+        # load the model once; callers pass precomputed embeddings to Chroma
+        _load_embed_model()
+        # embeddings are normalized, so cosine distance reduces to a dot product;
+        # index settings only apply when the collection is first created
         col = client.get_or_create_collection(
-            name=COLLECTION_NAME, embedding_function=embedding_fn
+            name=COLLECTION_NAME,
+            embedding_function=_SharedEmbedding(),
+            metadata={
+                "hnsw:space": "cosine",
+                "hnsw:M": HNSW_M,
+                "hnsw:construction_ef": HNSW_EF_CONSTRUCTION,
+                "hnsw:search_ef": HNSW_EF_SEARCH,
+            },
         )
         logger.debug("Initialized ChromaDB at %s", _db)
         return client, col
@@ -329,73 +745,224 @@ def init_chroma(db_dir: str | None = None):
         return None, None
 
 
+# Cached collection size so queries against an empty store skip the embedding
+# pass; None means unknown (always query).
+_mem_count: int | None = None
+_mem_count_lock = threading.Lock()
+
+
+def _reset_mem_count() -> None:
+    """Re-read the collection size after (re)initialization."""
+    global _mem_count
+    with _mem_count_lock:
+        try:
+            _mem_count = _memory_col.count() if _memory_col is not None else None
+        except Exception:
+            _mem_count = None
+
+
+def _bump_mem_count(n: int) -> None:
+    global _mem_count
+    with _mem_count_lock:
+        if _mem_count is not None:
+            _mem_count += n
+
+
 # initialize once with DB_DIR
 _chroma_client, _memory_col = init_chroma(DB_DIR)
+_reset_mem_count()
 
 
-def add_memory(text: str, meta: Dict | None = None) -> None:
-    if _memory_col is None:
+# _dirty_lock only guards the counter, so writers never wait on disk I/O;
+# _persist_lock serializes the saves themselves.
+_dirty_lock = threading.Lock()
+_persist_lock = threading.Lock()
+_dirty_counter = 0
+_persist_thread: threading.Thread | None = None
+
+
+def flush_memories() -> None:
+    """Persist pending memory writes now; no-op if nothing changed since the last flush."""
+    global _dirty_counter
+    with _persist_lock:
+        with _dirty_lock:
+            pending, _dirty_counter = _dirty_counter, 0
+        if pending <= 0 or _chroma_client is None:
+            return
+        # Chroma's PersistentClient writes through; only stores that expose
+        # persist() (the FAISS backend) need an explicit save.
+        persist = getattr(_chroma_client, "persist", None)
+        if persist is None:
+            return
+        try:
+            persist()
+        except Exception:
+            logger.exception("Failed to persist ChromaDB")
+            with _dirty_lock:
+                _dirty_counter += pending
+
+
+def _persist_loop() -> None:
+    while True:
+        time.sleep(PERSIST_INTERVAL)
+        flush_memories()
+
+
+def _mark_dirty(n: int) -> None:
+    """Record `n` unpersisted writes and make sure the persist timer is running."""
+    global _dirty_counter, _persist_thread
+    with _dirty_lock:
+        _dirty_counter += n
+        if _persist_thread is None:
+            _persist_thread = threading.Thread(target=_persist_loop, daemon=True)
+            _persist_thread.start()
+
+
+atexit.register(flush_memories)
+
+
+def add_memory_batch(
+    items: List[Tuple[str, Dict | None]], embeddings: List[List[float]] | None = None
+) -> None:
+    """Add several (text, meta) memories using one `add` call per CHROMA_MAX_BATCH items.
+
+    `embeddings`, if given, must line up with `items`; otherwise all texts are
+    encoded in a single model call.
+    """
+    if _memory_col is None or not items:
         return
-    if meta is None:
-        meta = {}
-    _id = f"mem_{int(time.time()*1000)}"
-    try:
-        _memory_col.add(ids=[_id], documents=[text], metadatas=[meta])
-    except Exception:
-        logger.exception("Failed to add memory")
+    stamp = int(time.time() * 1000)
+    ids = [f"mem_{stamp}_{i}" for i in range(len(items))]
+    docs = [text for text, _ in items]
+    metas = [meta or {} for _, meta in items]
+    if embeddings is None:
+        embeddings = _embed(docs)
+    added = 0
+    for start in range(0, len(ids), CHROMA_MAX_BATCH):
+        end = start + CHROMA_MAX_BATCH
+        kwargs = {}
+        if embeddings is not None:
+            kwargs["embeddings"] = embeddings[start:end]
+        try:
+            _memory_col.add(
+                ids=ids[start:end],
+                documents=docs[start:end],
+                metadatas=metas[start:end],
+                **kwargs,
+            )
+        except Exception:
+            logger.exception("Failed to add memory")
+            break
+        added += len(ids[start:end])
+    if added:
+        _bump_mem_count(added)
+        _mark_dirty(added)
 
 
-def query_memories(query_text: str, k: int = TOP_K) -> List[Dict]:
-    if _memory_col is None:
-        return []
+def add_memory(text: str, meta: Dict | None = None) -> None:
+    add_memory_batch([(text, meta)])
+
+
+class Memories(NamedTuple):
+    """Retrieved memories as parallel columns; `dists` is a float32 array when NumPy is available."""
+
+    texts: List[str]
+    metas: List[Dict]
+    dists: "np.ndarray | List[float]"
+
+
+_NO_MEMORIES = Memories([], [], [])
+
+
+def _mmr_select(query_vec, doc_vecs, k: int, lam: float) -> List[int]:
+    """Maximal marginal relevance: pick up to `k` rows of `doc_vecs`, most useful first."""
+    docs = np.asarray(doc_vecs, dtype=np.float32)
+    rel = docs @ np.asarray(query_vec, dtype=np.float32)
+    sims = docs @ docs.T
+    selected = np.zeros(len(docs), dtype=bool)
+    order: List[int] = []
+    for _ in range(min(k, len(docs))):
+        redundancy = sims[:, selected].max(axis=1) if order else 0.0
+        scores = lam * rel - (1.0 - lam) * redundancy
+        scores[selected] = -np.inf
+        i = int(np.argmax(scores))
+        selected[i] = True
+        order.append(i)
+    return order
+
+
+def query_memories(
+    query_text: str, k: int = TOP_K, embedding: List[float] | None = None
+) -> Memories:
+    """Return the `k` closest memories; pass `embedding` to reuse an already encoded query."""
+    if _memory_col is None or _mem_count == 0 or k <= 0:
+        return _NO_MEMORIES
+    if embedding is None:
+        vecs = _embed([query_text])
+        embedding = vecs[0] if vecs else None
+    use_mmr = MMR_LAMBDA is not None and embedding is not None and np is not None
+    include = ["documents", "metadatas", "distances"]
+    n_results = k
+    if use_mmr:
+        # over-fetch so MMR has candidates to trade off
+        include.append("embeddings")
+        n_results = k * 3
     try:
-        res = _memory_col.query(query_texts=[query_text], n_results=k)
+        if embedding is not None:
+            res = _memory_col.query(
+                query_embeddings=[embedding], n_results=n_results, include=include
+            )
+        else:
+            res = _memory_col.query(
+                query_texts=[query_text], n_results=n_results, include=include
+            )
         docs = res.get("documents", [[]])[0]
         metas = res.get("metadatas", [[]])[0]
-        return [{"text": d, "meta": m} for d, m in zip(docs, metas)]
+        dists = (res.get("distances") or [[]])[0]
+        if use_mmr and docs:
+            order = _mmr_select(embedding, res["embeddings"][0], k, MMR_LAMBDA)
+            docs = [docs[i] for i in order]
+            metas = [metas[i] for i in order]
+            dists = [dists[i] for i in order] if dists else dists
+        if np is not None:
+            dists = np.asarray(dists, dtype=np.float32)
+        return Memories(list(docs), list(metas), dists)
     except Exception:
         logger.exception("Memory query failed")
-        return []
+        return _NO_MEMORIES
 
 
 # -------------------------
 # API selection heuristic
 # -------------------------
 
-SHORT_HISTORY: List[str] = []
+# Recent turns for routing and prompt context; bounded so long sessions don't
+# grow it forever. The lock covers the main loop and the wake-word thread.
+SHORT_HISTORY: "collections.deque[str]" = collections.deque(maxlen=12)
+_history_lock = threading.Lock()
+
+
+# Keyword heuristics for routing to Gemini (recall of past turns / complex requests)
+_RECALL_RE = re.compile(
+    r"\b(?:remember|remind|what did i|previously|earlier|past|recall)\b", re.I
+)
+_COMPLEX_RE = re.compile(
+    r"\b(?:analyze|explain|summarize|plan|optimize|compare|why)\b", re.I
+)
+
+# A heavy recent conversation (by size, not turn count) also goes to Gemini;
+# counting turns would flip every session to Gemini after a few exchanges.
+ROUTE_HISTORY_TURNS = 8
+ROUTE_HISTORY_CHARS = 2000
 
 
 def choose_api(user_text: str, history: List[str]) -> str:
-    u = user_text.lower()
-    if any(
-        k in u
-        for k in [
-            "remember",
-            "remind",
-            "what did i",
-            "previously",
-            "earlier",
-            "past",
-            "recall",
-        ]
-    ):
+    if _RECALL_RE.search(user_text):
         return "gemini"
-    if (
-        len(user_text) > 200
-        or len(history) > 8
-        or any(
-            w in u
-            for w in [
-                "analyze",
-                "explain",
-                "summarize",
-                "plan",
-                "optimize",
-                "compare",
-                "why",
-            ]
-        )
-    ):
+    if len(user_text) > 200 or _COMPLEX_RE.search(user_text):
+        return "gemini"
+    recent = list(history)[-ROUTE_HISTORY_TURNS:]
+    if sum(len(h) for h in recent) > ROUTE_HISTORY_CHARS:
         return "gemini"
     return "groq"
 
@@ -405,7 +972,31 @@ def choose_api(user_text: str, history: List[str]) -> str:
 # -------------------------
 
 
-def call_groq(prompt: str) -> str:
+_groq_client = None
+_groq_lock = threading.Lock()
+
+
+def _get_groq():
+    """Return the shared Groq client so its connection pool stays warm across turns."""
+    global _groq_client
+    with _groq_lock:
+        if _groq_client is None:
+            _groq_client = groq.Client(api_key=GROQ_API_KEY, timeout=REQUEST_TIMEOUT)
+        return _groq_client
+
+
+def _stream_text(chunks, on_token) -> str:
+    """Forward each non-empty text chunk to `on_token` and return the full text."""
+    parts = []
+    for text in chunks:
+        if text:
+            parts.append(text)
+            on_token(text)
+    return "".join(parts)
+
+
+def call_groq(prompt: str, on_token=None) -> str:
+    """Ask Groq for a reply; with `on_token`, stream the reply and report each chunk."""
     if DRY_RUN:
         return "[dry-run] Groq simulated response"
     if not GROQ_API_KEY:
@@ -414,7 +1005,17 @@ def call_groq(prompt: str) -> str:
         return "`groq` package not installed."
 
     try:
-        client = groq.Client(api_key=GROQ_API_KEY)
+        client = _get_groq()
+        if on_token is not None:
+            stream = client.chat.completions.create(
+                model="llama-3",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=512,
+                stream=True,
+            )
+            return _stream_text(
+                (chunk.choices[0].delta.content for chunk in stream), on_token
+            )
         resp = client.completions.create(model="llama-3", prompt=prompt, max_tokens=512)
         # adjust as needed to match SDK shape
         if hasattr(resp, "choices"):
@@ -430,7 +1031,27 @@ def call_groq(prompt: str) -> str:
 # -------------------------
 
 
-def call_gemini(prompt: str) -> str:
+_genai_ready = False
+_genai_lock = threading.Lock()
+
+
+def _configure_genai() -> None:
+    """Run genai.configure once per process instead of on every call."""
+    global _genai_ready
+    with _genai_lock:
+        if _genai_ready:
+            return
+        if GOOGLE_API_KEY:
+            try:
+                genai.configure(api_key=GOOGLE_API_KEY)
+            except Exception:
+                # some genai versions may use different config flow; ignore if it fails
+                logger.debug("genai.configure failed (ignored)")
+        _genai_ready = True
+
+
+def call_gemini(prompt: str, on_token=None) -> str:
+    """Ask Gemini for a reply; with `on_token`, stream it when the client supports that."""
     if DRY_RUN:
         return "[dry-run] Gemini simulated response"
     if not (GOOGLE_API_KEY or GOOGLE_SA):
@@ -439,12 +1060,14 @@ def call_gemini(prompt: str) -> str:
         return "`google-genai` package not installed."
     try:
         # `google.genai` usage: configure then call ChatCompletion.create
-        if GOOGLE_API_KEY:
-            try:
-                genai.configure(api_key=GOOGLE_API_KEY)
-            except Exception:
-                # some genai versions may use different config flow; ignore if it fails
-                logger.debug("genai.configure failed (ignored)")
+        _configure_genai()
+        if on_token is not None and hasattr(genai, "GenerativeModel"):
+            stream = genai.GenerativeModel("gemini-1.5").generate_content(
+                prompt, stream=True
+            )
+            return _stream_text(
+                (getattr(chunk, "text", "") for chunk in stream), on_token
+            )
         # prefer ChatCompletion if available
         if hasattr(genai, "ChatCompletion"):
             resp = genai.ChatCompletion.create(
@@ -480,32 +1103,85 @@ def call_gemini(prompt: str) -> str:
 # -------------------------
 
 
-def build_prompt(user_text: str, memories: List[Dict], history: List[str]) -> str:
-    mem_text = (
-        "\n".join(f"- {m['text']}" for m in memories)
-        if memories
-        else "No relevant memories."
-    )
-    hist_text = "\n".join(history[-6:]) if history else ""
-    return f"Context - Relevant memories:\n{mem_text}\n\nConversation history:\n{hist_text}\n\nUser: {user_text}\nJarvis:"
+def build_prompt(user_text: str, memories: Memories, history: List[str]) -> str:
+    # assemble every line first and join once
+    parts = ["Context - Relevant memories:"]
+    if memories.texts:
+        parts.extend(f"- {t}" for t in memories.texts)
+    else:
+        parts.append("No relevant memories.")
+    parts.append("")
+    parts.append("Conversation history:")
+    parts.extend(list(history)[-6:] or [""])
+    parts.append("")
+    parts.append(f"User: {user_text}")
+    parts.append("Jarvis:")
+    return "\n".join(parts)
 
 
-def handle_input(user_text: str) -> str:
-    if not user_text:
-        return ""
-    SHORT_HISTORY.append(f"User: {user_text}")
-    memories = query_memories(user_text, k=TOP_K)
-    api = choose_api(user_text, SHORT_HISTORY)
-    prompt = build_prompt(user_text, memories, SHORT_HISTORY)
-    resp = call_groq(prompt) if api == "groq" else call_gemini(prompt)
-    SHORT_HISTORY.append(f"Jarvis: {resp}")
-    add_memory(user_text, meta={"type": "user"})
-    add_memory(resp, meta={"type": "assistant"})
+# Memory writes are applied in order on a single worker so the reply never
+# waits for embedding/indexing.
+_write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-mem-write")
+
+
+def _retrieve(user_text: str):
+    # encode the user text once and reuse it for both the query and the add
+    vecs = _embed([user_text])
+    user_vec = vecs[0] if vecs else None
+    return user_vec, query_memories(user_text, k=TOP_K, embedding=user_vec)
+
+
+def _store_turn(user_text: str, resp: str, user_vec) -> None:
     try:
-        if _chroma_client:
-            _chroma_client.persist()
+        embeddings = None
+        if user_vec is not None:
+            embeddings = [user_vec] + _embed([resp])
+        add_memory_batch(
+            [(user_text, {"type": "user"}), (resp, {"type": "assistant"})], embeddings
+        )
     except Exception:
-        logger.exception("Failed to persist ChromaDB")
+        logger.exception("Failed to store conversation turn")
+
+
+def wait_for_memory_writes() -> None:
+    """Block until memory writes queued by handle_input have been applied."""
+    _write_pool.submit(lambda: None).result()
+
+
+def handle_input(user_text: str, stream_speech: bool = False) -> str:
+    """Answer `user_text` and return the reply.
+
+    With `stream_speech`, the reply is spoken sentence by sentence as the model
+    streams it, so the caller must not speak the returned text again.
+    """
+    if not user_text:
+        return ""
+    with _history_lock:
+        SHORT_HISTORY.append(f"User: {user_text}")
+        history = list(SHORT_HISTORY)
+    api = choose_api(user_text, history)
+    # small talk ("ok", "hi") gains nothing from long-term memory
+    use_memory = api == "gemini" or len(user_text) >= MEM_MIN_LEN
+    user_vec, memories = None, _NO_MEMORIES
+    if use_memory:
+        user_vec, memories = _retrieve(user_text)
+    prompt = build_prompt(user_text, memories, history)
+    call = call_groq if api == "groq" else call_gemini
+    if stream_speech:
+        sentences = _SentenceStream(speak)
+        resp = call(prompt, on_token=sentences.feed)
+        if sentences.started:
+            sentences.close()
+        else:
+            # nothing was streamed (dry-run, errors, non-streaming client)
+            speak(resp)
+    else:
+        resp = call(prompt)
+    with _history_lock:
+        SHORT_HISTORY.append(f"Jarvis: {resp}")
+    if use_memory:
+        # one batched write per turn; persisting is left to the background timer
+        _write_pool.submit(_store_turn, user_text, resp, user_vec)
     return resp
 
 
@@ -530,12 +1206,15 @@ def set_options(
     if db_dir:
         DB_DIR = db_dir
         _chroma_client, _memory_col = init_chroma(DB_DIR)
+        _reset_mem_count()
     if log_file:
         fh = logging.FileHandler(log_file)
         fh.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
         logger.addHandler(fh)
     if debug:
         logger.setLevel(logging.DEBUG)
+        # dump Python tracebacks if a native audio/TTS driver crashes the process
+        faulthandler.enable()
 
 
 def _on_wake_detected_interactive():
@@ -546,8 +1225,7 @@ def _on_wake_detected_interactive():
         if not cmd:
             speak("I didn't catch that.")
             return
-        resp = handle_input(cmd)
-        speak(resp)
+        handle_input(cmd, stream_speech=True)
     except Exception:
         logger.exception("Error handling command after wake word")
 
@@ -617,8 +1295,7 @@ def main():
             if txt.lower().strip() in ("exit", "quit", "goodbye"):
                 speak("Goodbye, Sir.")
                 break
-            out = handle_input(txt)
-            speak(out)
+            handle_input(txt, stream_speech=True)
     except KeyboardInterrupt:
         speak("Shutting down.")
         sys.exit(0)
@@ -639,11 +1316,11 @@ def main_loop() -> None:
             if txt.lower().strip() in ("exit", "quit", "goodbye"):
                 speak("Goodbye.")
                 break
-            out = handle_input(txt)
-            speak(out)
+            handle_input(txt, stream_speech=True)
         except KeyboardInterrupt:
             speak("Shutting down.")
             break
+    speak_flush()
 
 
 def main():
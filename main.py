@@ -9,50 +9,141 @@ Improvements:
 - Safer input parsing for IPs, cities, and wiki topics
 """
 
+import contextvars
 import json
 import logging
 import os
+import queue
 import re
+import socket
 import sys
 import threading
 import time
-from logging.handlers import RotatingFileHandler
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from urllib.parse import quote_plus
 
 # Optional third-party imports; handle missing modules gracefully
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("Missing dependency: requests. Install with `pip install requests`")
     raise
 
 try:
-    import pyttsx3
-except Exception:
-    pyttsx3 = None
+    import orjson
+except ImportError:
+    orjson = None
 
-try:
-    import speech_recognition as sr
-except Exception:
-    sr = None
-
-# Try to import dotenv loader but do NOT automatically call it on import.
-# Auto-loading .env at import time can interfere with test expectations that rely
-# on program environment variables being controlled by the test harness.
-try:
-    from dotenv import load_dotenv
-except Exception:
-    load_dotenv = None
+# pyttsx3, speech_recognition and python-dotenv are imported on first use
+# (see _get_engine, _get_sr and the __main__ block) so --command runs and
+# test imports don't pay for the audio stack.
 
 # ==========================
 # CONFIGURATION
 # ==========================
-SHODAN_API_KEY = os.getenv("SHODAN_API_KEY")
-IPINFO_TOKEN = os.getenv("IPINFO_TOKEN")
-OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+_env_file_mtimes: dict[str, float] = {}  # path -> mtime when last loaded
+
+
+def load_env_file(path: str = ENV_FILE) -> bool:
+    """Load `path` into os.environ unless it is unchanged since the last load.
+
+    Returns True when the file was (re)read. A missing file or missing
+    python-dotenv is not an error.
+    """
+    path = os.path.abspath(path)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return False
+    if _env_file_mtimes.get(path) == mtime:
+        return False
+    try:
+        from dotenv import load_dotenv
+
+        load_dotenv(path)
+    except Exception:
+        # dotenv missing, or some versions assert in weird contexts; ignore safely
+        return False
+    _env_file_mtimes[path] = mtime
+    return True
+
+
+# API keys are read from the environment at call time, so a key added to the
+# environment (or .env) later is picked up without re-importing the module.
+
+
+def _shodan_key():
+    return os.getenv("SHODAN_API_KEY")
+
+
+def _ipinfo_token():
+    return os.getenv("IPINFO_TOKEN")
+
+
+def _openweather_key():
+    return os.getenv("OPENWEATHER_API_KEY")
+
 
 REQUEST_TIMEOUT = 10  # seconds for external API calls
 
+
+def _make_session() -> requests.Session:
+    """Build the shared HTTP session: keep-alive pooling plus a couple of retries."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive", "User-Agent": "jarvis/1.0"})
+    return session
+
+
+# one pooled session for all lookups so repeat calls reuse TCP/TLS connections
+_SESSION = _make_session()
+
+
+def _http_get(url: str, timeout: float = REQUEST_TIMEOUT):
+    """Single transport seam for every lookup (and for tests to patch)."""
+    return _SESSION.get(url, timeout=timeout)
+
+
+LOOKUP_HOSTS = (
+    "api.shodan.io",
+    "ipinfo.io",
+    "api.openweathermap.org",
+    "en.wikipedia.org",
+)
+DNS_REFRESH_INTERVAL = 15 * 60  # seconds between resolver cache refreshes
+
+
+def _prewarm_dns(hosts=LOOKUP_HOSTS):
+    """Resolve each lookup host once so the first real request skips DNS."""
+    for host in hosts:
+        try:
+            socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+        except OSError as e:
+            logger.debug("DNS prewarm failed for %s: %s", host, e)
+
+
+def _start_dns_prewarm():
+    """Keep the resolver cache warm for the lookup hosts in a daemon thread."""
+
+    def _loop():
+        while True:
+            _prewarm_dns()
+            time.sleep(DNS_REFRESH_INTERVAL)
+
+    threading.Thread(target=_loop, name="jarvis-dns", daemon=True).start()
+
+
 # ==========================
 # LOGGING
 # ==========================
@@ -60,15 +151,43 @@ LOG_FILE = os.getenv("LOG_FILE")  # optional file path to write logs
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
 
+
+class _QueuedFileHandler(QueueHandler):
+    """Rotating file log whose disk writes happen on a background thread.
+
+    Logging calls only enqueue the record; flush() waits until the writer
+    has caught up, and close() drains whatever is still pending.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(queue.Queue(-1))
+        self.file_handler = RotatingFileHandler(path, maxBytes=10_000_00, backupCount=3)
+        self.file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self._listener = QueueListener(self.queue, self.file_handler)
+        self._listener.start()
+        self._stopped = False
+
+    def flush(self):
+        if not self._stopped:
+            self.queue.join()
+            self.file_handler.flush()
+
+    def close(self):
+        if not self._stopped:
+            self._stopped = True
+            self._listener.stop()
+            self.file_handler.close()
+        super().close()
+
+
 # create module logger
 logger = logging.getLogger(__name__)
 logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
 
 # attach handler(s)
 if LOG_FILE:
-    fh = RotatingFileHandler(LOG_FILE, maxBytes=10_000_00, backupCount=3)
+    fh = _QueuedFileHandler(LOG_FILE)
     fh.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
-    fh.setFormatter(logging.Formatter(LOG_FORMAT))
     logger.addHandler(fh)
 else:
     sh = logging.StreamHandler()
@@ -96,13 +215,13 @@ def set_log_level(level_name: str):
 
 def set_log_file(path: str):
     """Set or replace the file handler for logging at `path`."""
-    # remove existing RotatingFileHandler if present
+    # remove existing file handler if present
     for h in list(logger.handlers):
-        if isinstance(h, RotatingFileHandler):
+        if isinstance(h, (_QueuedFileHandler, RotatingFileHandler)):
             logger.removeHandler(h)
+            h.close()
 
-    fh = RotatingFileHandler(path, maxBytes=10_000_00, backupCount=3)
-    fh.setFormatter(logging.Formatter(LOG_FORMAT))
+    fh = _QueuedFileHandler(path)
     fh.setLevel(logger.level)
     logger.addHandler(fh)
 
@@ -115,18 +234,56 @@ def enable_debug():
 # ==========================
 # TTS (Text-to-Speech)
 # ==========================
-engine = None
-if pyttsx3:
-    try:
-        engine = pyttsx3.init()
-    except Exception:
-        engine = None
+_engine = None
+_engine_loaded = False
+_engine_lock = threading.Lock()
+
+
+def _get_engine():
+    """Initialise the pyttsx3 engine on first use; None if TTS is unavailable."""
+    global _engine, _engine_loaded
+    with _engine_lock:
+        if not _engine_loaded:
+            _engine_loaded = True
+            try:
+                import pyttsx3
+
+                _engine = pyttsx3.init()
+            except Exception:
+                _engine = None
+    return _engine
+
+
+_sr = None
+_sr_loaded = False
+
+
+def _get_sr():
+    """Import SpeechRecognition on first use; None if it isn't installed."""
+    global _sr, _sr_loaded
+    if not _sr_loaded:
+        try:
+            import speech_recognition
+
+            _sr = speech_recognition
+        except Exception:
+            _sr = None
+        _sr_loaded = True
+    return _sr
+
+
+# set by run_single_command(no_audio=True); a ContextVar keeps the silence
+# local to that call instead of swapping the module-level speak()
+_SPEAK_SUPPRESS = contextvars.ContextVar("speak_suppress", default=False)
 
 
 def speak(text: str):
     """Speak text in a background thread; fallback to print if TTS not available."""
+    if _SPEAK_SUPPRESS.get():
+        return
 
     def _speak():
+        engine = _get_engine()
         if engine:
             try:
                 engine.say(text)
@@ -148,6 +305,7 @@ def speak(text: str):
 
 def listen() -> str:
     """Listen for a voice command. If microphone or SR isn't available, fall back to typed input."""
+    sr = _get_sr()
     if sr is None:
         # SpeechRecognition not installed or failed to import
         return input("Type command: ").strip().lower()
@@ -178,37 +336,166 @@ def listen() -> str:
         return input("Type command: ").strip().lower()
 
 
+def _start_background_listener(commands: queue.Queue):
+    """Push recognized utterances onto `commands` as soon as each phrase ends.
+
+    Uses SpeechRecognition's background listener so capture never pauses
+    between turns. Returns its stop function, or None when no microphone is
+    usable (callers then fall back to listen()). If the listener dies or the
+    recognition service is unreachable, None is queued so the caller can fall
+    back to listen() and its typed-input path.
+    """
+    sr = _get_sr()
+    if sr is None:
+        return None
+    recognizer = sr.Recognizer()
+    try:
+        source = sr.Microphone()
+        # Microphone.__enter__ swallows stream-open failures (e.g. a busy
+        # device) and leaves stream None, which would kill the listener later
+        with source:
+            if source.stream is None:
+                raise OSError("could not open the microphone stream")
+    except Exception as e:
+        logger.warning("Microphone not available or error initializing: %s", e)
+        return None
+
+    listen_once = recognizer.listen
+
+    def _listen_or_report(*args, **kwargs):
+        # listen_in_background's thread exits on any error but a timeout;
+        # tell the main loop before it goes
+        try:
+            return listen_once(*args, **kwargs)
+        except sr.WaitTimeoutError:
+            raise
+        except Exception as e:
+            logger.warning("Background listener stopped: %s", e)
+            commands.put(None)
+            raise
+
+    recognizer.listen = _listen_or_report
+
+    def _on_audio(rec, audio):
+        try:
+            command = rec.recognize_google(audio)
+            print(f"🗣️ You said: {command}")
+            commands.put(command.lower())
+        except sr.UnknownValueError:
+            print("❌ Could not understand audio.")
+        except sr.RequestError as e:
+            logger.warning("Speech recognition service error: %s", e)
+            commands.put(None)
+        except Exception:
+            logger.exception("Background recognition failed")
+
+    try:
+        return recognizer.listen_in_background(source, _on_audio, phrase_time_limit=10)
+    except Exception as e:
+        logger.warning("Background listening unavailable: %s", e)
+        return None
+
+
 # ==========================
 # HELPERS
 # ==========================
 
-IP_RE = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}\b")
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+# orjson parses API payloads in C; both raise ValueError subclasses on bad JSON
+_loads = orjson.loads if orjson else json.loads
+
+IP_RE = re.compile(rf"\b{_OCTET}(?:\.{_OCTET}){{3}}\b")
 
 
-def _extract_ip(text: str):
+def _find_ip(text: str):
+    """Scan a raw utterance for the first valid IPv4 address."""
     m = IP_RE.search(text)
     return m.group(0) if m else None
 
 
+def _is_ipv4(s: str) -> bool:
+    """True if `s` is exactly one IPv4 address (each octet 0-255)."""
+    return IP_RE.fullmatch(s) is not None
+
+
+class _TTLCache:
+    """Thread-safe LRU cache whose entries go stale after `ttl` seconds.
+
+    Stale entries stay until evicted so a lookup can still answer from them
+    when the upstream service is unreachable.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, allow_stale: bool = False):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stamp, value = entry
+            if not allow_stale and time.monotonic() - stamp > self.ttl:
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Per-endpoint response caches keyed by the normalized lookup argument; the
+# TTLs follow how quickly each upstream's data actually changes.
+_SHODAN_CACHE = _TTLCache(maxsize=512, ttl=3600)
+_IPINFO_CACHE = _TTLCache(maxsize=2048, ttl=86400)
+_WEATHER_CACHE = _TTLCache(maxsize=256, ttl=300)
+_WIKI_CACHE = _TTLCache(maxsize=1024, ttl=3600)
+
+
+def clear_lookup_caches():
+    """Drop every cached lookup response, including the repeat-command guard."""
+    global _last_command
+    for cache in (_SHODAN_CACHE, _IPINFO_CACHE, _WEATHER_CACHE, _WIKI_CACHE):
+        cache.clear()
+    with _last_command_lock:
+        _last_command = ("", 0.0, "")
+
+
 # ==========================
 # API MODULES
 # ==========================
 
 
-def shodan_lookup(ip: str) -> str:
-    if not SHODAN_API_KEY:
+def shodan_lookup(ip: str, no_cache: bool = False) -> str:
+    api_key = _shodan_key()
+    if not api_key:
         return "Shodan API key not set. Export SHODAN_API_KEY or add to .env"
 
-    if not _extract_ip(ip):
+    ip = ip.strip()
+    if not _is_ipv4(ip):
         return "No valid IPv4 address found in input."
+    if not no_cache:
+        cached = _SHODAN_CACHE.get(ip)
+        if cached is not None:
+            return cached
 
     base = "https://api.shodan.io/shodan/host"
-    url = f"{base}/{ip}?key={SHODAN_API_KEY}"
+    url = f"{base}/{ip}?key={api_key}"
     try:
-        res = requests.get(url, timeout=REQUEST_TIMEOUT)
+        res = _http_get(url)
         if res.status_code != 200:
             return f"Shodan API error: {res.status_code} - {res.text}"
-        data = res.json()
+        data = _loads(res.content)
         if "error" in data:
             return f"Shodan error: {data['error']}"
         info = (
@@ -216,26 +503,36 @@ def shodan_lookup(ip: str) -> str:
             f"Organization: {data.get('org')}\n"
             f"Open Ports: {data.get('ports')}"
         )
+        _SHODAN_CACHE.put(ip, info)
         return info
     except requests.RequestException as e:
+        stale = _SHODAN_CACHE.get(ip, allow_stale=True)
+        if stale is not None:
+            return stale
         return f"Network error contacting Shodan: {e}"
     except ValueError:
         return "Unexpected response from Shodan (invalid JSON)"
 
 
-def ipinfo_lookup(ip: str) -> str:
-    if not _extract_ip(ip):
+def ipinfo_lookup(ip: str, no_cache: bool = False) -> str:
+    ip = ip.strip()
+    if not _is_ipv4(ip):
         return "No valid IPv4 address found in input."
-
-    if IPINFO_TOKEN:
-        url = f"https://ipinfo.io/{ip}?token={IPINFO_TOKEN}"
+    if not no_cache:
+        cached = _IPINFO_CACHE.get(ip)
+        if cached is not None:
+            return cached
+
+    token = _ipinfo_token()
+    if token:
+        url = f"https://ipinfo.io/{ip}?token={token}"
     else:
         url = f"https://ipinfo.io/{ip}"
     try:
-        res = requests.get(url, timeout=REQUEST_TIMEOUT)
+        res = _http_get(url)
         if res.status_code != 200:
             return f"ipinfo error: {res.status_code} - {res.text}"
-        data = res.json()
+        data = _loads(res.content)
         info = (
             f"IP: {data.get('ip')}\n"
             f"City: {data.get('city')}\n"
@@ -243,47 +540,74 @@ def ipinfo_lookup(ip: str) -> str:
             f"Country: {data.get('country')}\n"
             f"Org: {data.get('org')}"
         )
+        _IPINFO_CACHE.put(ip, info)
         return info
     except requests.RequestException as e:
+        stale = _IPINFO_CACHE.get(ip, allow_stale=True)
+        if stale is not None:
+            return stale
         return f"Network error contacting ipinfo: {e}"
+    except ValueError:
+        return "Unexpected response from ipinfo (invalid JSON)"
 
 
-def weather_lookup(city: str) -> str:
+def weather_lookup(city: str, no_cache: bool = False) -> str:
     city = city.strip()
     if not city:
         return "Please specify a city for weather lookup."
-    if not OPENWEATHER_API_KEY:
+    api_key = _openweather_key()
+    if not api_key:
         return "OpenWeather API key not set. Export OPENWEATHER_API_KEY or add to .env"
+    key = city.lower()
+    if not no_cache:
+        cached = _WEATHER_CACHE.get(key)
+        if cached is not None:
+            return cached
 
     q = quote_plus(city)
-    url = f"https://api.openweathermap.org/data/2.5/weather?q={q}&appid={OPENWEATHER_API_KEY}&units=metric"
+    url = f"https://api.openweathermap.org/data/2.5/weather?q={q}&appid={api_key}&units=metric"
     try:
-        res = requests.get(url, timeout=REQUEST_TIMEOUT)
-        data = res.json()
+        res = _http_get(url)
+        data = _loads(res.content)
         if res.status_code != 200:
             return f"Weather error: {data.get('message', res.text)}"
         desc = data["weather"][0]["description"]
         temp = data["main"]["temp"]
-        return f"Weather in {city}: {desc}, {temp}°C"
+        info = f"Weather in {city}: {desc}, {temp}°C"
+        _WEATHER_CACHE.put(key, info)
+        return info
     except requests.RequestException as e:
+        stale = _WEATHER_CACHE.get(key, allow_stale=True)
+        if stale is not None:
+            return stale
         return f"Network error contacting OpenWeather: {e}"
     except (KeyError, ValueError):
         return "Unexpected response from weather service."
 
 
-def wiki_lookup(query: str) -> str:
+def wiki_lookup(query: str, no_cache: bool = False) -> str:
     query = query.strip()
     if not query:
         return "Please specify a topic to search on Wikipedia."
+    key = query.lower()
+    if not no_cache:
+        cached = _WIKI_CACHE.get(key)
+        if cached is not None:
+            return cached
     q = quote_plus(query)
     url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{q}"
     try:
-        res = requests.get(url, timeout=REQUEST_TIMEOUT)
+        res = _http_get(url)
         if res.status_code != 200:
             return f"Wikipedia error: {res.status_code}"
-        data = res.json()
-        return data.get("extract", "No summary found.")
+        data = _loads(res.content)
+        extract = data.get("extract", "No summary found.")
+        _WIKI_CACHE.put(key, extract)
+        return extract
     except requests.RequestException as e:
+        stale = _WIKI_CACHE.get(key, allow_stale=True)
+        if stale is not None:
+            return stale
         return f"Network error contacting Wikipedia: {e}"
     except ValueError:
         return "Unexpected response from Wikipedia (invalid JSON)"
@@ -294,57 +618,170 @@ def wiki_lookup(query: str) -> str:
 # ==========================
 
 
+# Compound commands ("weather in paris and ipinfo 8.8.8.8") are split here and
+# their lookups run side by side on the shared session.
+_COMPOUND_SPLIT_RE = re.compile(r"\s+and\s+|\s*;\s*")
+_WEATHER_RE = re.compile(r"weather(?: in)?\s+(.+)")
+_WIKI_RE = re.compile(r"(?:wikipedia|who is|who's)\s+(.+)")
+_LOOKUP_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jarvis-lookup")
+# the interactive loop hands lookups to this worker so it can keep listening
+# while a request is in flight; one worker keeps replies in order
+_COMMAND_WORKER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-command")
+
+
+def _shodan_command(command: str):
+    ip = _find_ip(command)
+    if not ip:
+        return None, "Please provide an IPv4 address for Shodan lookup."
+    return shodan_lookup, ip
+
+
+def _ipinfo_command(command: str):
+    ip = _find_ip(command)
+    if not ip:
+        return None, "Please provide an IPv4 address for IP info lookup."
+    return ipinfo_lookup, ip
+
+
+def _weather_command(command: str):
+    m = _WEATHER_RE.search(command)
+    return (weather_lookup, m.group(1).strip()) if m else None
+
+
+def _wiki_command(command: str):
+    m = _WIKI_RE.search(command)
+    return (wiki_lookup, m.group(1).strip()) if m else None
+
+
+# "verb argument" commands resolve with one dict hit on the first word
+_COMMAND_TABLE = {
+    "shodan": _shodan_command,
+    "ipinfo": _ipinfo_command,
+    "weather": _weather_command,
+    "wikipedia": _wiki_command,
+    "who": _wiki_command,
+    "who's": _wiki_command,
+}
+
+# free-form phrasings ("what's the weather in paris") fall back to a keyword
+# scan, in priority order
+_COMMAND_KEYWORDS = (
+    ("shodan", _shodan_command),
+    ("ipinfo", _ipinfo_command),
+    ("ip info", _ipinfo_command),
+    ("weather", _weather_command),
+    ("wikipedia", _wiki_command),
+    ("who is", _wiki_command),
+    ("who's", _wiki_command),
+)
+# one alternation finds every keyword present in a single pass over the text
+_KEYWORD_RE = re.compile("|".join(re.escape(kw) for kw, _ in _COMMAND_KEYWORDS))
+
+
+def _parse_command(command: str):
+    """Map a single command to (lookup, argument).
+
+    Returns (None, message) when a lookup is recognized but its argument is
+    missing, and None when the command is not a lookup at all.
+    """
+    handler = _COMMAND_TABLE.get(command.partition(" ")[0])
+    if handler is not None:
+        parsed = handler(command)
+        if parsed is not None:
+            return parsed
+
+    hits = {m.group(0) for m in _KEYWORD_RE.finditer(command)}
+    if not hits:
+        return None
+    for keyword, handler in _COMMAND_KEYWORDS:
+        if keyword in hits:
+            parsed = handler(command)
+            if parsed is not None:
+                return parsed
+    return None
+
+
+def _parse_compound(command: str):
+    """Return the lookups of a compound command, or None if it isn't one.
+
+    Every part must be a complete lookup on its own, so "weather in trinidad
+    and tobago" is still treated as a single weather query. IP lookups may
+    share one address ("shodan and ipinfo 8.8.8.8").
+    """
+    parts = _COMPOUND_SPLIT_RE.split(command)
+    if len(parts) < 2:
+        return None
+    lookups = [_parse_command(part) for part in parts]
+    ip = _find_ip(command)
+    if ip:
+        lookups = [
+            _parse_command(f"{part} {ip}") if lk is not None and lk[0] is None else lk
+            for part, lk in zip(parts, lookups)
+        ]
+    if all(lk is not None and lk[0] is not None for lk in lookups):
+        return lookups
+    return None
+
+
+# whole words only, so "exitman" or "quite" never end the session
+_EXIT_WORDS = frozenset(("exit", "quit"))
+# words without surrounding punctuation, so typed "exit." or "quit!" still count
+_WORD_RE = re.compile(r"[a-z']+")
+
+# A mis-firing recognizer often delivers the same phrase twice in a row; a
+# repeat inside this window returns the previous result without redoing it.
+REPEAT_WINDOW = 1.5  # seconds
+_last_command = ("", 0.0, "")  # (command, monotonic time, result)
+_last_command_lock = threading.Lock()
+
+
 def process_command(command: str):
     """Process a command, speak/print the result, and return the result string.
 
     Returns:
         str: The result text (or 'exit' for exit commands).
     """
+    global _last_command
     command = command.lower().strip()
     if not command:
         return ""
 
-    logger.info("Processing command: %s", command)
+    with _last_command_lock:
+        last, at, last_result = _last_command
+    if command == last and time.monotonic() - at < REPEAT_WINDOW:
+        logger.debug("Ignoring repeated command: %s", command)
+        return last_result
 
-    if "shodan" in command:
-        ip = _extract_ip(command)
-        if not ip:
-            res = "Please provide an IPv4 address for Shodan lookup."
-            speak(res)
-            return res
-        result = shodan_lookup(ip)
-        print(result)
-        speak(result)
-        return result
+    result = _run_command(command)
+    with _last_command_lock:
+        _last_command = (command, time.monotonic(), result)
+    return result
 
-    if "ipinfo" in command or "ip info" in command:
-        ip = _extract_ip(command)
-        if not ip:
-            res = "Please provide an IPv4 address for IP info lookup."
-            speak(res)
-            return res
-        result = ipinfo_lookup(ip)
-        print(result)
-        speak(result)
-        return result
 
-    m = re.search(r"weather(?: in)?\s+(.+)", command)
-    if m:
-        city = m.group(1).strip()
-        result = weather_lookup(city)
+def _run_command(command: str) -> str:
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Processing command: %s", command)
+
+    lookups = _parse_compound(command)
+    if lookups:
+        results = _LOOKUP_POOL.map(lambda lk: lk[0](lk[1]), lookups)
+        result = "\n\n".join(results)
         print(result)
         speak(result)
         return result
 
-    m = re.search(r"(?:wikipedia|who is|who's)\s+(.+)", command)
-    if m:
-        topic = m.group(1).strip()
-        result = wiki_lookup(topic)
+    lookup = _parse_command(command)
+    if lookup is not None:
+        fn, arg = lookup
+        if fn is None:
+            speak(arg)
+            return arg
+        result = fn(arg)
         print(result)
         speak(result)
         return result
 
-    if "exit" in command or "quit" in command:
+    if not _EXIT_WORDS.isdisjoint(_WORD_RE.findall(command)):
         speak("Goodbye.")
         sys.exit(0)
         return "exit"
@@ -354,16 +791,19 @@ def process_command(command: str):
     return res
 
 
+def _is_lookup(command: str) -> bool:
+    command = command.lower().strip()
+    return _parse_compound(command) is not None or _parse_command(command) is not None
+
+
 def run_single_command(command: str, no_audio: bool = False) -> str:
     """Run a single command and return the result. Optionally disable audio output."""
     if no_audio:
-        # temporarily disable speak by replacing with a no-op
-        orig_speak = globals().get("speak")
+        token = _SPEAK_SUPPRESS.set(True)
         try:
-            globals()["speak"] = lambda text: None
             return process_command(command)
         finally:
-            globals()["speak"] = orig_speak
+            _SPEAK_SUPPRESS.reset(token)
     return process_command(command)
 
 
@@ -372,21 +812,32 @@ def run_single_command(command: str, no_audio: bool = False) -> str:
 # ==========================
 
 
-def main():
-    import argparse
+_parser = None
 
-    parser = argparse.ArgumentParser(description="Jarvis-like assistant")
-    parser.add_argument(
-        "--command", "-c", help="Run a single command and exit", type=str
-    )
-    parser.add_argument(
-        "--no-audio", action="store_true", help="Disable audio output (speak)"
-    )
-    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
-    parser.add_argument(
-        "--log-file", help="Path to write logs (overrides LOG_FILE env var)"
-    )
-    args = parser.parse_args()
+
+def _get_parser():
+    """Build the CLI parser once; argparse is only imported when main() runs."""
+    global _parser
+    if _parser is None:
+        import argparse
+
+        parser = argparse.ArgumentParser(description="Jarvis-like assistant")
+        parser.add_argument(
+            "--command", "-c", help="Run a single command and exit", type=str
+        )
+        parser.add_argument(
+            "--no-audio", action="store_true", help="Disable audio output (speak)"
+        )
+        parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+        parser.add_argument(
+            "--log-file", help="Path to write logs (overrides LOG_FILE env var)"
+        )
+        _parser = parser
+    return _parser
+
+
+def main(argv=None):
+    args = _get_parser().parse_args(argv)
 
     if args.debug:
         enable_debug()
@@ -400,26 +851,50 @@ def main():
             print(res)
         return
 
+    _start_dns_prewarm()
     speak("Jarvis online. How can I assist?")
+    commands = queue.Queue()
+    stop_listening = _start_background_listener(commands)
+
+    def next_command():
+        nonlocal stop_listening
+        if stop_listening is None:
+            return listen()
+        # short timeouts keep Ctrl+C responsive while waiting for a phrase
+        while True:
+            try:
+                command = commands.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if command is not None:
+                return command
+            # the listener died or recognition is offline; listen() per turn
+            # from now on, which also offers typed input
+            stop_listening(wait_for_stop=False)
+            stop_listening = None
+            return listen()
+
     try:
         while True:
-            command = listen()
-            if command:
+            command = next_command()
+            if not command:
+                continue
+            if _is_lookup(command):
+                _COMMAND_WORKER.submit(process_command, command)
+            else:
+                # exit/quit and unrecognized commands stay on the main thread
                 process_command(command)
-            time.sleep(0.5)
     except KeyboardInterrupt:
         logger.info("Shutting down (KeyboardInterrupt)")
         speak("Goodbye.")
         sys.exit(0)
+    finally:
+        if stop_listening is not None:
+            stop_listening(wait_for_stop=False)
 
 
 if __name__ == "__main__":
     # Load .env at runtime when running the script directly, but avoid doing
     # this automatically during import (helps tests that manipulate env vars).
-    if load_dotenv:
-        try:
-            load_dotenv()
-        except Exception:
-            # Some dotenv versions may assert in weird contexts; ignore safely
-            pass
+    load_env_file()
     main()
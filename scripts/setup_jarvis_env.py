@@ -32,36 +32,42 @@ def prompt_secret(prompt: str) -> str:
     return val.strip()
 
 
-def set_key(key: str, value: str, file_path: Path) -> None:
-    # safely set or replace key in file
+def set_keys(values: dict[str, str], file_path: Path) -> None:
+    # set or replace every key with one read and one atomic write
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    file_path.touch(exist_ok=True)
-    text = file_path.read_text()
-    lines = text.splitlines()
+    lines = file_path.read_text().splitlines() if file_path.exists() else []
+    pending = dict(values)
     out = []
-    replaced = False
     for line in lines:
-        if line.startswith(key + "="):
-            out.append(f"{key}={value}")
-            replaced = True
+        key = line.split("=", 1)[0]
+        if "=" in line and key in pending:
+            out.append(f"{key}={pending.pop(key)}")
         else:
             out.append(line)
-    if not replaced:
-        out.append(f"{key}={value}")
-    file_path.write_text("\n".join(out) + "\n")
+    out.extend(f"{key}={value}" for key, value in pending.items())
+    tmp = file_path.with_name(file_path.name + ".tmp")
+    tmp.write_text("\n".join(out) + "\n")
+    os.replace(tmp, file_path)
+
+
+def set_key(key: str, value: str, file_path: Path) -> None:
+    set_keys({key: value}, file_path)
 
 
 def main():
     print(
         f"This will interactively update {ENV_FILE} with Jarvis keys (press Enter to skip optional)."
     )
+    new = {}
     for key, desc in KEYS:
         if key == "GOOGLE_APPLICATION_CREDENTIALS":
             val = input(f"{desc} (path) [optional]: ").strip()
         else:
             val = prompt_secret(desc)
         if val:
-            set_key(key, val, ENV_FILE)
+            new[key] = val
+    if new:
+        set_keys(new, ENV_FILE)
     # ensure .env is in .gitignore
     gitignore = REPO_ROOT / ".gitignore"
     if gitignore.exists():
@@ -1,8 +1,19 @@
 import os
 import sys
 
+import pytest
+
 # Ensure the project root (parent directory of tests) is on sys.path
 # This makes `import main` work when running the test suite
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_lookup_caches():
+    """Keep cached API responses in `main` from leaking between tests."""
+    mod = sys.modules.get("main")
+    if mod is not None and hasattr(mod, "clear_lookup_caches"):
+        mod.clear_lookup_caches()
+    yield
@@ -1,3 +1,4 @@
+import json
 import types
 
 import main
@@ -9,16 +10,16 @@ class DummyResponse:
         self._data = data or {}
         self.text = text
 
+    @property
+    def content(self):
+        return json.dumps(self._data).encode()
+
     def json(self):
         return self._data
 
 
 def test_shodan_missing_key(monkeypatch):
     monkeypatch.setenv("SHODAN_API_KEY", "")
-    # reload module to pick up env change
-    import importlib
-
-    importlib.reload(main)
 
     res = main.shodan_lookup("8.8.8.8")
     assert "Shodan API key not set" in res
@@ -26,17 +27,13 @@ def test_shodan_missing_key(monkeypatch):
 
 def test_shodan_valid_response(monkeypatch):
     monkeypatch.setenv("SHODAN_API_KEY", "FAKE")
-    # reload to pick up env change
-    import importlib
-
-    importlib.reload(main)
 
     def fake_get(url, timeout=None):
         return DummyResponse(
             200, {"ip_str": "8.8.8.8", "org": "Google", "ports": [53, 443]}
         )
 
-    monkeypatch.setattr(main, "requests", types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(main, "_http_get", fake_get)
     res = main.shodan_lookup("8.8.8.8")
     assert "IP: 8.8.8.8" in res
     assert "Organization: Google" in res
@@ -60,33 +57,26 @@ def test_ipinfo_valid(monkeypatch):
             },
         )
 
-    monkeypatch.setattr(main, "requests", types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(main, "_http_get", fake_get)
     res = main.ipinfo_lookup("1.2.3.4")
     assert "City: Testville" in res
 
 
 def test_weather_missing_key(monkeypatch):
     monkeypatch.delenv("OPENWEATHER_API_KEY", raising=False)
-    import importlib
-
-    importlib.reload(main)
     res = main.weather_lookup("London")
     assert "OpenWeather API key not set" in res
 
 
 def test_weather_valid(monkeypatch):
     monkeypatch.setenv("OPENWEATHER_API_KEY", "FAKE")
-    # reload to pick up env change
-    import importlib
-
-    importlib.reload(main)
 
     def fake_get(url, timeout=None):
         return DummyResponse(
             200, {"weather": [{"description": "sunny"}], "main": {"temp": 20}}
         )
 
-    monkeypatch.setattr(main, "requests", types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(main, "_http_get", fake_get)
     res = main.weather_lookup("London")
     assert "Weather in London" in res
 
@@ -100,6 +90,118 @@ def test_wiki_valid(monkeypatch):
     def fake_get(url, timeout=None):
         return DummyResponse(200, {"extract": "An example page summary."})
 
-    monkeypatch.setattr(main, "requests", types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(main, "_http_get", fake_get)
     res = main.wiki_lookup("Python")
     assert "example page summary" in res.lower()
+
+
+def test_ip_helpers_validate_octets():
+    assert main._find_ip("shodan 8.8.8.8 please") == "8.8.8.8"
+    assert main._find_ip("shodan 999.999.999.999") is None
+    assert main._is_ipv4("255.255.255.255")
+    assert not main._is_ipv4("256.1.1.1")
+    assert not main._is_ipv4("info 8.8.8.8")
+
+
+def test_shodan_rejects_out_of_range_ip(monkeypatch):
+    monkeypatch.setenv("SHODAN_API_KEY", "FAKE")
+
+    def fail_get(url, timeout=None):
+        raise AssertionError("invalid IP must not reach the network")
+
+    monkeypatch.setattr(main, "_http_get", fail_get)
+    assert "No valid IPv4" in main.shodan_lookup("999.1.1.1")
+
+
+def test_lookups_share_pooled_session():
+    adapter = main._SESSION.get_adapter("https://ipinfo.io/")
+    assert adapter is main._SESSION.get_adapter("https://en.wikipedia.org/")
+    assert adapter._pool_maxsize == 16
+    assert main._SESSION.headers["Connection"] == "keep-alive"
+
+
+def test_wiki_lookup_is_cached_with_stale_fallback(monkeypatch):
+    calls = []
+
+    def fake_get(url, timeout=None):
+        calls.append(url)
+        return DummyResponse(200, {"extract": "Cached summary."})
+
+    monkeypatch.setattr(main, "_http_get", fake_get)
+    assert main.wiki_lookup("Python") == "Cached summary."
+    assert main.wiki_lookup("  python ") == "Cached summary."
+    assert len(calls) == 1
+
+    main.wiki_lookup("Python", no_cache=True)
+    assert len(calls) == 2
+
+    def down(url, timeout=None):
+        raise main.requests.ConnectionError("offline")
+
+    monkeypatch.setattr(main, "_http_get", down)
+    assert main.wiki_lookup("Python", no_cache=True) == "Cached summary."
+    assert "Network error" in main.wiki_lookup("Rust")
+
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: now[0])
+    cache = main._TTLCache(maxsize=2, ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.get("a", allow_stale=True) == 1
+    cache.put("c", 3)
+    assert cache.get("b", allow_stale=True) is None
+
+
+def test_prewarm_dns_resolves_every_lookup_host(monkeypatch):
+    seen = []
+
+    def fake_getaddrinfo(host, port, *args, **kwargs):
+        seen.append(host)
+        if host == "ipinfo.io":
+            raise OSError("resolver down")
+        return []
+
+    monkeypatch.setattr(main.socket, "getaddrinfo", fake_getaddrinfo)
+    main._prewarm_dns()
+    assert seen == list(main.LOOKUP_HOSTS)
+
+
+def test_ipinfo_invalid_json(monkeypatch):
+    bad = types.SimpleNamespace(status_code=200, content=b"<html>", text="<html>")
+    monkeypatch.setattr(main, "_http_get", lambda u, timeout=None: bad)
+    assert "invalid JSON" in main.ipinfo_lookup("1.2.3.4")
+
+
+def test_load_env_file_skips_unchanged_file(tmp_path, monkeypatch):
+    import os
+
+    monkeypatch.delenv("JARVIS_TEST_KEY", raising=False)
+    env = tmp_path / ".env"
+    env.write_text("JARVIS_TEST_KEY=one\n")
+    assert main.load_env_file(str(env))
+    assert os.environ["JARVIS_TEST_KEY"] == "one"
+    assert not main.load_env_file(str(env))
+    os.utime(env, (1, 1))
+    assert main.load_env_file(str(env))
+    assert not main.load_env_file(str(tmp_path / "missing.env"))
+
+
+def test_load_env_file_tracks_each_path(tmp_path, monkeypatch):
+    import os
+
+    monkeypatch.delenv("JARVIS_TEST_A", raising=False)
+    monkeypatch.delenv("JARVIS_TEST_B", raising=False)
+    a, b = tmp_path / "a.env", tmp_path / "b.env"
+    a.write_text("JARVIS_TEST_A=1\n")
+    b.write_text("JARVIS_TEST_B=2\n")
+    os.utime(a, (5, 5))
+    os.utime(b, (5, 5))
+    # same mtime, different file: B must still be read
+    assert main.load_env_file(str(a))
+    assert main.load_env_file(str(b))
+    assert os.environ["JARVIS_TEST_B"] == "2"
+    assert not main.load_env_file(str(a))
@@ -20,3 +20,17 @@ def test_set_log_file_writes(tmp_path, monkeypatch):
     assert log_file.exists()
     content = log_file.read_text()
     assert "Processing command" in content.lower() or "weather" in content.lower()
+
+
+def test_file_logging_is_queued_and_flushable(tmp_path):
+    log_file = tmp_path / "queued.log"
+    main.set_log_file(str(log_file))
+    handler = next(
+        h for h in main.logger.handlers if isinstance(h, main._QueuedFileHandler)
+    )
+    main.logger.warning("queued record")
+    handler.flush()
+    assert "queued record" in log_file.read_text()
+    # replacing the file drains and closes the previous writer
+    main.set_log_file(str(tmp_path / "next.log"))
+    assert handler not in main.logger.handlers
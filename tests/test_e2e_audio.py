@@ -39,7 +39,7 @@ def test_main_loop_dry_run_no_audio(monkeypatch):
         calls["n"] += 1
         return "hello" if calls["n"] == 1 else "exit"
 
-    def fake_groq(prompt: str):
+    def fake_groq(prompt: str, on_token=None):
         return "simulated response"
 
     # Capture speak calls by setting NO_AUDIO
@@ -1,5 +1,8 @@
 import os
 import tempfile
+import time
+
+import pytest
 
 from tools import jarvis_gui
 
@@ -37,6 +40,399 @@ def test_start_stop_process_monkeypatched(monkeypatch):
 
     fake = FakeProc()
     monkeypatch.setattr(jarvis_gui.subprocess, "Popen", lambda *a, **k: fake)
+    monkeypatch.setattr(jarvis_gui, "STOP_GRACE_SECONDS", 0.1)
     # Start should not raise
     jarvis_gui.start_jarvis_process()
+    jarvis_gui.stop_jarvis_process(wait=True)
+
+
+def test_drain_log_queue_takes_everything_at_once():
+    jarvis_gui.drain_log_queue()
+    for i in range(3):
+        jarvis_gui.append_log(f"line {i}")
+    assert jarvis_gui.drain_log_queue() == ["line 0", "line 1", "line 2"]
+    assert jarvis_gui.drain_log_queue() == []
+
+
+def test_log_poll_delay_adapts():
+    lo, hi = jarvis_gui.LOG_POLL_MIN_MS, jarvis_gui.LOG_POLL_MAX_MS
+    assert jarvis_gui.next_poll_delay(hi, drained=5) == lo
+    assert jarvis_gui.next_poll_delay(lo, drained=0) == lo * 2
+    assert jarvis_gui.next_poll_delay(hi, drained=0) == hi
+
+
+def test_start_process_uses_large_pipe_buffer(monkeypatch):
+    seen = {}
+
+    class FakeProc:
+        stdout = []
+
+        def poll(self):
+            return None
+
+    def fake_popen(cmd, **kwargs):
+        seen.update(kwargs)
+        return FakeProc()
+
+    monkeypatch.setattr(jarvis_gui, "PROCESS", None)
+    monkeypatch.setattr(jarvis_gui.subprocess, "Popen", fake_popen)
+    jarvis_gui.start_jarvis_process()
+    assert seen["bufsize"] == jarvis_gui.PIPE_BUFSIZE
+
+
+def test_reader_thread_batches_binary_chunks():
+    import io
+
+    jarvis_gui.drain_log_queue()
+    pipe = io.BufferedReader(io.BytesIO("one\r\ntwo\nthrée\npartial".encode()))
+    jarvis_gui._reader_thread(pipe)
+    assert jarvis_gui.drain_log_queue() == ["one", "two", "thrée", "partial"]
+
+
+def test_child_command_forces_unbuffered_output(monkeypatch):
+    monkeypatch.setattr(jarvis_gui.shutil, "which", lambda name: "/usr/bin/stdbuf")
+    monkeypatch.setattr(jarvis_gui.sys, "platform", "linux")
+    cmd, env = jarvis_gui._child_command()
+    assert cmd[:3] == ["/usr/bin/stdbuf", "-oL", "-eL"]
+    assert env["PYTHONUNBUFFERED"] == "1" and env["PYTHONIOENCODING"] == "utf-8"
+
+    monkeypatch.setattr(jarvis_gui.shutil, "which", lambda name: None)
+    cmd, _ = jarvis_gui._child_command()
+    assert cmd[0] == jarvis_gui.PY
+
+    # a stdbuf found on PATH elsewhere (Git/MSYS on Windows) is not used
+    monkeypatch.setattr(jarvis_gui.shutil, "which", lambda name: "C:/msys/stdbuf.exe")
+    monkeypatch.setattr(jarvis_gui.sys, "platform", "win32")
+    cmd, env = jarvis_gui._child_command()
+    assert cmd[0] == jarvis_gui.PY
+    assert env["PYTHONUNBUFFERED"] == "1"
+
+
+def test_set_env_keys_single_rewrite(tmp_path, monkeypatch):
+    env = tmp_path / ".env"
+    env.write_text("# jarvis\nGROQ_API_KEY=old\n")
+    monkeypatch.setattr(jarvis_gui, "ENV_FILE", env)
+    jarvis_gui.set_env_keys({"GROQ_API_KEY": "g", "GOOGLE_API_KEY": "gg"})
+    assert env.read_text() == "# jarvis\nGROQ_API_KEY=g\nGOOGLE_API_KEY=gg\n"
+    assert not (tmp_path / ".env.tmp").exists()
+
+
+def test_set_env_key_keeps_backslashes_and_other_lines(tmp_path, monkeypatch):
+    env = tmp_path / ".env"
+    env.write_text("GOOGLE_API_KEY_OLD=x\nGOOGLE_API_KEY=old")
+    monkeypatch.setattr(jarvis_gui, "ENV_FILE", env)
+    jarvis_gui.set_env_key("GOOGLE_API_KEY", r"C:\keys\new")
+    assert env.read_text() == "GOOGLE_API_KEY_OLD=x\nGOOGLE_API_KEY=C:\\keys\\new\n"
+
+
+def test_stop_does_not_block_status_reads(monkeypatch):
+    import threading
+
+    release = threading.Event()
+
+    class SlowProc:
+        stdout = []
+
+        def poll(self):
+            return None
+
+        def terminate(self):
+            pass
+
+        def kill(self):
+            pass
+
+        def wait(self, timeout=None):
+            release.wait(5)
+
+    proc = SlowProc()
+    monkeypatch.setattr(jarvis_gui, "PROCESS", proc)
+    monkeypatch.setattr(jarvis_gui, "STOP_GRACE_SECONDS", 0.1)
+    jarvis_gui.RUNNING.set()
     jarvis_gui.stop_jarvis_process()
+    # the terminate/wait runs on a worker; the lock is free and status is readable
+    assert jarvis_gui.STOPPING.is_set()
+    assert jarvis_gui.PROCESS_LOCK.acquire(timeout=1)
+    jarvis_gui.PROCESS_LOCK.release()
+    assert jarvis_gui.is_jarvis_running()
+    release.set()
+    jarvis_gui.stop_jarvis_process(wait=True)
+    assert not jarvis_gui.is_jarvis_running() and not jarvis_gui.STOPPING.is_set()
+    assert jarvis_gui.PROCESS is None
+
+
+def test_stop_kills_child_that_ignores_terminate(monkeypatch):
+    calls = []
+
+    class StubbornProc:
+        returncode = None
+
+        def poll(self):
+            return self.returncode
+
+        def terminate(self):
+            calls.append("terminate")
+
+        def kill(self):
+            calls.append("kill")
+            self.returncode = -9
+
+        def wait(self, timeout=None):
+            calls.append(("wait", timeout))
+            return self.returncode
+
+    monkeypatch.setattr(jarvis_gui, "PROCESS", StubbornProc())
+    monkeypatch.setattr(jarvis_gui, "STOP_GRACE_SECONDS", 0.1)
+    jarvis_gui.RUNNING.set()
+    started = time.monotonic()
+    jarvis_gui.stop_jarvis_process(wait=True)
+    assert time.monotonic() - started < 2
+    assert calls == ["terminate", "kill", ("wait", None)]
+    assert jarvis_gui.PROCESS is None
+
+
+def test_log_queue_drops_oldest_on_overflow(monkeypatch):
+    from collections import deque
+
+    monkeypatch.setattr(jarvis_gui, "LOG_QUEUE_MAX", 4)
+    monkeypatch.setattr(jarvis_gui, "LOG_DEQUE", deque(maxlen=4))
+    monkeypatch.setattr(jarvis_gui, "_dropped_lines", 0)
+    monkeypatch.setattr(jarvis_gui, "_last_drop_note", 0.0)
+    # a multi-line chunk is buffered, bounded and counted line by line
+    jarvis_gui.append_log("line 0\nline 1\nline 2")
+    for i in range(3, 6):
+        jarvis_gui.append_log(f"line {i}")
+    assert jarvis_gui.drain_log_queue() == [
+        "... 2 log lines dropped ...",
+        "line 2",
+        "line 3",
+        "line 4",
+        "line 5",
+    ]
+
+
+def test_log_buffer_caps_line_length_and_batch_size(monkeypatch):
+    monkeypatch.setattr(jarvis_gui, "LOG_LINE_MAX", 5)
+    monkeypatch.setattr(jarvis_gui, "LOG_DRAIN_MAX", 2)
+    jarvis_gui.drain_log_queue(limit=len(jarvis_gui.LOG_DEQUE))
+    jarvis_gui.append_log("x" * 100 + "\nb\nc")
+    assert jarvis_gui.drain_log_queue() == ["xxxxx ...", "b"]
+    assert jarvis_gui.drain_log_queue() == ["c"]
+
+
+def test_reader_flushes_overlong_partial_lines(monkeypatch):
+    import io
+
+    monkeypatch.setattr(jarvis_gui, "PIPE_BUFSIZE", 4)
+    jarvis_gui.drain_log_queue()
+    pipe = io.BufferedReader(io.BytesIO(b"abcdefghij"), buffer_size=4)
+    jarvis_gui._reader_thread(pipe)
+    # no newline ever arrives, yet the partial line is not held back unbounded
+    assert jarvis_gui.drain_log_queue() == ["abcdefgh", "ij"]
+
+
+def test_check_devices_probes_off_thread_and_caches(monkeypatch):
+    import threading
+
+    devices = []
+    opened = []
+    done = threading.Event()
+
+    class FakePyAudio:
+        def get_device_count(self):
+            return len(devices)
+
+        def get_device_info_by_index(self, i):
+            return devices[i]
+
+    class FakeRoot:
+        def after(self, ms, fn, *args):
+            fn(*args)
+            done.set()
+
+    class FakeLabel:
+        def config(self, **kw):
+            self.text = kw["text"]
+
+    def fake_get_pyaudio():
+        opened.append(1)
+        return FakePyAudio()
+
+    monkeypatch.delenv("JARVIS_MIC_NAME", raising=False)
+    monkeypatch.setattr(jarvis_gui.jarvis, "_get_pyaudio", fake_get_pyaudio)
+    monkeypatch.setattr(jarvis_gui.jarvis, "check_camera", lambda: False)
+    gui = jarvis_gui.JarvisGUI.__new__(jarvis_gui.JarvisGUI)
+    gui.root = FakeRoot()
+    gui.mic_status, gui.cam_status = FakeLabel(), FakeLabel()
+    gui._dev_cache, gui._probing = None, False
+
+    try:
+        gui.check_devices()
+        assert done.wait(5)
+        assert gui.mic_status.text == "Mic: Missing"
+        assert gui.cam_status.text == "Cam: Missing"
+        # within the TTL the cached result is reused without probing
+        gui.check_devices()
+        assert len(opened) == 1
+
+        # a mic plugged in later is seen once the TTL has passed
+        devices.append({"name": "USB mic", "maxInputChannels": 1})
+        done.clear()
+        monkeypatch.setattr(jarvis_gui, "DEVICE_CHECK_TTL", 0)
+        gui.check_devices()
+        assert done.wait(5)
+        assert gui.mic_status.text == "Mic: OK"
+        assert len(opened) == 2
+    finally:
+        jarvis_gui.jarvis.get_available_mics.cache_clear()
+
+
+def test_tray_icon_is_created_once(monkeypatch):
+    import types
+
+    created = []
+
+    class FakeIcon:
+        def __init__(self, name, image, title, menu):
+            created.append(self)
+            self.visible = False
+            self.menu = menu
+
+        def run(self):
+            pass
+
+    fake_pystray = types.SimpleNamespace(
+        Icon=FakeIcon,
+        Menu=lambda *items: items,
+        MenuItem=lambda text, action: (text, action),
+    )
+    monkeypatch.setattr(jarvis_gui, "pystray", fake_pystray)
+    monkeypatch.setattr(jarvis_gui, "_TRAY_IMAGE", object())
+
+    class FakeRoot:
+        def withdraw(self):
+            pass
+
+        def deiconify(self):
+            pass
+
+        def after(self, ms, fn, *args):
+            fn(*args)
+
+    gui = jarvis_gui.JarvisGUI.__new__(jarvis_gui.JarvisGUI)
+    gui.root = FakeRoot()
+    gui.tray_icon = None
+    gui.minimize_to_tray()
+    icon = created[0]
+    show = dict(icon.menu)["Show"]
+    show(icon, None)
+    assert icon.visible is False
+    gui.minimize_to_tray()
+    assert len(created) == 1 and icon.visible is True
+
+
+def test_log_widget_is_trimmed_to_max_lines(monkeypatch):
+    calls = []
+
+    class FakeText:
+        def __init__(self):
+            self.lines = []
+
+        def config(self, **kw):
+            calls.append("config")
+
+        def insert(self, where, text):
+            calls.append("insert")
+            self.lines.extend(text.splitlines())
+
+        def delete(self, start, end):
+            calls.append("delete")
+            del self.lines[: int(end.split(".")[0]) - 1]
+
+        def see(self, where):
+            calls.append("see")
+
+    monkeypatch.setattr(jarvis_gui, "LOG_MAX_LINES", 3)
+    gui = jarvis_gui.JarvisGUI.__new__(jarvis_gui.JarvisGUI)
+    gui.log_text = FakeText()
+    gui._log_lines = 0
+    gui.append_log(["a", "b"])
+    assert calls == ["config", "insert", "see", "config"]
+    gui.append_log(["c", "d", "e"])
+    assert gui.log_text.lines == ["c", "d", "e"]
+    # a single entry can hold a whole multi-line chunk from the reader
+    gui.append_log(["1\n2\n3\n4", "5\n6"])
+    assert gui.log_text.lines == ["4", "5", "6"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="pipes are not selectable on Windows")
+def test_reader_thread_polls_pipe_and_honours_stop():
+    import threading
+
+    r, w = os.pipe()
+    os.write(w, b"hello\nworld\n")
+    jarvis_gui.drain_log_queue()
+    stop = threading.Event()
+    with open(r, "rb") as pipe:
+        t = threading.Thread(target=jarvis_gui._reader_thread, args=(pipe, None, stop))
+        t.start()
+        deadline = time.monotonic() + 5
+        while not jarvis_gui.LOG_DEQUE and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # the write end is still open; the stop flag alone ends the reader
+        stop.set()
+        t.join(5)
+        assert not t.is_alive()
+    os.close(w)
+    assert jarvis_gui.drain_log_queue() == ["hello", "world"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="pipes are not selectable on Windows")
+def test_old_reader_cannot_stop_a_new_childs_reader(monkeypatch):
+    import threading
+
+    procs, threads = [], []
+
+    class FakeProc:
+        def __init__(self):
+            r, self.write_fd = os.pipe()
+            self.stdout = open(r, "rb")
+            self.returncode = None
+            procs.append(self)
+
+        def poll(self):
+            return self.returncode
+
+        def terminate(self):
+            self.returncode = 0
+
+    class TrackedThread(threading.Thread):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            threads.append(self)
+
+    monkeypatch.setattr(jarvis_gui.subprocess, "Popen", lambda *a, **k: FakeProc())
+    monkeypatch.setattr(jarvis_gui.threading, "Thread", TrackedThread)
+    monkeypatch.setattr(jarvis_gui, "PROCESS", None)
+    monkeypatch.setattr(jarvis_gui, "READER_STOP", None)
+    try:
+        jarvis_gui.start_jarvis_process()
+        first_stop = jarvis_gui.READER_STOP
+        jarvis_gui.stop_jarvis_process(wait=True)
+        assert first_stop.is_set()
+
+        jarvis_gui.start_jarvis_process()
+        second_stop = jarvis_gui.READER_STOP
+        assert second_stop is not first_stop and not second_stop.is_set()
+        # a late stop of the old child only touches its own reader and state
+        jarvis_gui._stop_worker(procs[0], first_stop)
+        assert not second_stop.is_set() and jarvis_gui.PROCESS is procs[1]
+        assert jarvis_gui.is_jarvis_running()
+        jarvis_gui.stop_jarvis_process(wait=True)
+        assert second_stop.is_set()
+    finally:
+        for t in threads:
+            t.join(5)
+        for proc in procs:
+            os.close(proc.write_fd)
+            proc.stdout.close()
@@ -14,16 +14,33 @@ def test_choose_api_long_or_history_uses_gemini():
     long_text = "x" * 300
     assert jarvis.choose_api(long_text, []) == "gemini"
     assert jarvis.choose_api("please analyze this", ["h"] * 10) == "gemini"
+    assert jarvis.choose_api("go on", ["x" * 300] * 8) == "gemini"
+    # many short turns are not a reason to leave the fast model
+    assert jarvis.choose_api("go on", ["User: hi"] * 50) == "groq"
+
+
+def test_choose_api_keywords_match_whole_words():
+    assert jarvis.choose_api("What did I say earlier?", []) == "gemini"
+    assert jarvis.choose_api("Explain DNS", []) == "gemini"
+    assert jarvis.choose_api("order pasta", []) == "groq"
+    assert jarvis.choose_api("name a planet", []) == "groq"
 
 
 def test_build_prompt_includes_memories_and_history():
-    mems = [{"text": "remember this", "meta": {}}]
+    mems = jarvis.Memories(["remember this"], [{}], [0.1])
     hist = ["User: hi", "Jarvis: hello"]
     prompt = jarvis.build_prompt("What's up", mems, hist)
     assert "remember this" in prompt
     assert "User: What's up" in prompt
 
 
+def test_build_prompt_accepts_bounded_history():
+    hist = jarvis.collections.deque((f"User: {i}" for i in range(20)), maxlen=12)
+    prompt = jarvis.build_prompt("hi", jarvis.Memories([], [], []), hist)
+    assert "User: 19" in prompt and "User: 13" not in prompt
+    assert jarvis.SHORT_HISTORY.maxlen == 12
+
+
 def test_call_groq_key_missing_message():
     old = os.environ.pop("GROQ_API_KEY", None)
     try:
@@ -53,13 +70,108 @@ def test_add_and_query_memory():
     text = f"pytest-memory-{int(time.time())}"
     jarvis.add_memory(text, meta={"test": True})
     res = jarvis.query_memories(text, k=5)
-    assert any(
-        text in m["text"]
-        for m in [
-            {"text": r, "meta": m}
-            for r, m in zip(
-                res and [r["text"] for r in res] or [],
-                res and [r["meta"] for r in res] or [],
-            )
-        ]
+    assert any(text in t for t in res.texts)
+
+
+@pytest.mark.skipif(jarvis.faiss is None, reason="faiss not available")
+def test_faiss_store_query_and_persist(tmp_path):
+    store = jarvis._FaissMemoryStore(str(tmp_path), dim=2)
+    store.add(
+        ids=["a", "b"],
+        documents=["north", "east"],
+        metadatas=[{"k": 1}, {"k": 2}],
+        embeddings=[[0.0, 1.0], [1.0, 0.0]],
+    )
+    res = store.query(query_embeddings=[[0.1, 0.9]], n_results=1)
+    assert res["documents"] == [["north"]]
+    store.persist()
+
+    reloaded = jarvis._FaissMemoryStore(str(tmp_path), dim=2)
+    assert reloaded.count() == 2
+    assert reloaded.get()["metadatas"] == [{"k": 1}, {"k": 2}]
+
+
+@pytest.mark.skipif(jarvis.faiss is None, reason="faiss not available")
+def test_faiss_store_recovers_from_interrupted_persist(tmp_path):
+    store = jarvis._FaissMemoryStore(str(tmp_path), dim=2)
+    store.add(ids=["a"], documents=["north"], metadatas=[{}], embeddings=[[0.0, 1.0]])
+    store.persist()
+    index_bytes = (tmp_path / "faiss.index").read_bytes()
+    store.add(ids=["b"], documents=["east"], metadatas=[{}], embeddings=[[1.0, 0.0]])
+    store.persist()
+    assert not list(tmp_path.glob("*.tmp"))
+
+    # crash after the records were replaced but before the index was
+    (tmp_path / "faiss.index").write_bytes(index_bytes)
+    reloaded = jarvis._FaissMemoryStore(str(tmp_path), dim=2)
+    assert reloaded.get()["ids"] == ["a"]
+    res = reloaded.query(query_embeddings=[[1.0, 0.0]], n_results=5)
+    assert res["documents"] == [["north"]]
+
+    # an index with vectors but no matching records can't be trusted
+    (tmp_path / "faiss_records.json").write_text(
+        '{"ids": [], "documents": [], "metadatas": []}', encoding="utf-8"
+    )
+    with pytest.raises(ValueError):
+        jarvis._FaissMemoryStore(str(tmp_path), dim=2)
+
+
+@pytest.mark.skipif(jarvis.np is None, reason="numpy not available")
+def test_mmr_select_prefers_novel_results():
+    query = [1.0, 0.0]
+    docs = [[1.0, 0.0], [0.99, 0.14], [0.7, 0.71]]
+    # pure relevance keeps similarity order; a low lambda skips the near-duplicate
+    assert jarvis._mmr_select(query, docs, 2, lam=1.0) == [0, 1]
+    assert jarvis._mmr_select(query, docs, 2, lam=0.3) == [0, 2]
+
+
+def test_load_embed_model_uses_fp16_on_cuda(monkeypatch):
+    import sys
+    import types
+
+    loaded = []
+
+    class FakeModel:
+        def __init__(self, name, device=None):
+            self.device = device
+            self.halved = False
+            loaded.append(self)
+
+        def half(self):
+            self.halved = True
+            return self
+
+    fake_torch = types.SimpleNamespace(
+        cuda=types.SimpleNamespace(is_available=lambda: True)
+    )
+    monkeypatch.setitem(sys.modules, "torch", fake_torch)
+    monkeypatch.setattr(jarvis, "SentenceTransformer", FakeModel)
+    monkeypatch.setattr(jarvis, "_embed_model", None)
+    jarvis._load_embed_model()
+    jarvis._load_embed_model()
+    assert len(loaded) == 1
+    assert loaded[0].device == "cuda" and loaded[0].halved
+
+
+def test_init_chroma_creates_cosine_collection(monkeypatch, tmp_path):
+    import types
+
+    seen = {}
+
+    class FakeClient:
+        def __init__(self, path):
+            seen["path"] = path
+
+        def get_or_create_collection(self, name, embedding_function, metadata):
+            seen["metadata"] = metadata
+            return "col"
+
+    monkeypatch.setattr(
+        jarvis, "chromadb", types.SimpleNamespace(PersistentClient=FakeClient)
     )
+    monkeypatch.setattr(jarvis, "VECTOR_BACKEND", "chroma")
+    monkeypatch.setattr(jarvis, "_embed_model", object())
+    client, col = jarvis.init_chroma(str(tmp_path))
+    assert col == "col" and seen["path"] == str(tmp_path)
+    assert seen["metadata"]["hnsw:space"] == "cosine"
+    assert seen["metadata"]["hnsw:M"] == jarvis.HNSW_M
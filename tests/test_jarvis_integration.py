@@ -71,12 +71,284 @@ def test_memory_add_query_mock(monkeypatch):
         def add(self, ids, documents, metadatas):
             self.added.append((ids, documents, metadatas))
 
-        def query(self, query_texts, n_results):
-            return {"documents": [["fake memory result"]], "metadatas": [[{"k": "v"}]]}
+        def query(self, query_texts, n_results, include=None):
+            return {
+                "documents": [["fake memory result"]],
+                "metadatas": [[{"k": "v"}]],
+                "distances": [[0.25]],
+            }
 
     fake = FakeCol()
     monkeypatch.setattr(jarvis, "_memory_col", fake)
     jarvis.add_memory("remember me", meta={"test": True})
     assert fake.added
     res = jarvis.query_memories("remember me", k=1)
-    assert res and res[0]["text"] == "fake memory result"
+    assert res.texts == ["fake memory result"]
+    assert res.metas == [{"k": "v"}]
+    assert list(res.dists) == [0.25]
+
+
+def test_handle_input_batches_memory_writes(monkeypatch):
+    class FakeCol:
+        def __init__(self):
+            self.added = []
+
+        def add(self, ids, documents, metadatas):
+            self.added.append((ids, documents, metadatas))
+
+        def query(self, query_texts, n_results, include=None):
+            return {"documents": [[]], "metadatas": [[]]}
+
+    class FakeClient:
+        def __init__(self):
+            self.persisted = 0
+
+        def persist(self):
+            self.persisted += 1
+
+    fake, client = FakeCol(), FakeClient()
+    monkeypatch.setattr(jarvis, "_memory_col", fake)
+    monkeypatch.setattr(jarvis, "_chroma_client", client)
+    monkeypatch.setattr(jarvis, "_persist_thread", object())
+    monkeypatch.setattr(jarvis, "_dirty_counter", 0)
+    monkeypatch.setattr(jarvis, "SHORT_HISTORY", [])
+    monkeypatch.setattr(jarvis, "MEM_MIN_LEN", 0)
+    monkeypatch.setattr(jarvis, "call_groq", lambda prompt: "hi there")
+
+    jarvis.handle_input("Hello Jarvis")
+    jarvis.wait_for_memory_writes()
+    assert len(fake.added) == 1
+    ids, docs, metas = fake.added[0]
+    assert docs == ["Hello Jarvis", "hi there"]
+    assert len(set(ids)) == 2
+    # persist is deferred to the background timer
+    assert client.persisted == 0
+    jarvis.flush_memories()
+    assert client.persisted == 1
+    jarvis.flush_memories()
+    assert client.persisted == 1
+
+
+def test_handle_input_encodes_user_text_once(monkeypatch):
+    encoded = []
+
+    class FakeArray(list):
+        def tolist(self):
+            return list(self)
+
+    class FakeModel:
+        def encode(self, texts, **kwargs):
+            encoded.extend(texts)
+            return FakeArray([[float(len(t))] for t in texts])
+
+    class FakeCol:
+        def __init__(self):
+            self.calls = []
+
+        def add(self, ids, documents, metadatas, embeddings=None):
+            self.calls.append(("add", embeddings))
+
+        def query(
+            self, query_embeddings=None, n_results=None, query_texts=None, include=None
+        ):
+            self.calls.append(("query", query_embeddings))
+            return {"documents": [[]], "metadatas": [[]]}
+
+    fake = FakeCol()
+    monkeypatch.setattr(jarvis, "_embed_model", FakeModel())
+    monkeypatch.setattr(jarvis, "_memory_col", fake)
+    monkeypatch.setattr(jarvis, "_persist_thread", object())
+    monkeypatch.setattr(jarvis, "SHORT_HISTORY", [])
+    monkeypatch.setattr(jarvis, "MEM_MIN_LEN", 0)
+    monkeypatch.setattr(jarvis, "call_groq", lambda prompt: "ok")
+
+    jarvis.handle_input("Hello Jarvis")
+    jarvis.wait_for_memory_writes()
+    assert encoded == ["Hello Jarvis", "ok"]
+    assert fake.calls == [("query", [[12.0]]), ("add", [[12.0], [2.0]])]
+
+
+def test_speak_uses_single_worker_in_order(monkeypatch, capsys):
+    monkeypatch.setattr(jarvis, "pyttsx3", None)
+    monkeypatch.setattr(jarvis, "_tts_thread", None)
+    monkeypatch.setattr(jarvis, "_tts_queue", jarvis.queue.Queue())
+    prev = jarvis.NO_AUDIO
+    try:
+        jarvis.set_options(no_audio=False)
+        jarvis.speak("Yes?")
+        worker = jarvis._tts_thread
+        jarvis.speak("Here is the answer.")
+        assert jarvis._tts_thread is worker
+        jarvis.speak_flush()
+    finally:
+        jarvis.set_options(no_audio=prev)
+    out = capsys.readouterr().out
+    assert out.index("Yes?") < out.index("Here is the answer.")
+
+
+def test_speak_queues_long_text_by_sentence(monkeypatch):
+    q = jarvis.queue.Queue()
+    monkeypatch.setattr(jarvis, "_tts_thread", object())
+    monkeypatch.setattr(jarvis, "_tts_queue", q)
+    prev = jarvis.NO_AUDIO
+    try:
+        jarvis.set_options(no_audio=False)
+        long_text = "First sentence here. " + "x" * 120 + "! Last one?"
+        jarvis.speak(long_text)
+        jarvis.speak("Short. Reply.")
+    finally:
+        jarvis.set_options(no_audio=prev)
+    items = [q.get_nowait() for _ in range(q.qsize())]
+    assert items == [
+        "First sentence here.",
+        "x" * 120 + "!",
+        "Last one?",
+        "Short. Reply.",
+    ]
+
+
+def test_groq_client_and_genai_config_are_reused(monkeypatch):
+    created, configured = [], []
+
+    class FakeResp:
+        choices = [types.SimpleNamespace(text="pong")]
+
+    class FakeClient:
+        def __init__(self, api_key=None, timeout=None):
+            created.append(timeout)
+            self.completions = types.SimpleNamespace(create=lambda **kw: FakeResp())
+
+    fake_genai = types.SimpleNamespace(
+        configure=lambda api_key=None: configured.append(api_key)
+    )
+    monkeypatch.setattr(jarvis, "groq", types.SimpleNamespace(Client=FakeClient))
+    monkeypatch.setattr(jarvis, "genai", fake_genai)
+    monkeypatch.setattr(jarvis, "GROQ_API_KEY", "k")
+    monkeypatch.setattr(jarvis, "GOOGLE_API_KEY", "g")
+    monkeypatch.setattr(jarvis, "_groq_client", None)
+    monkeypatch.setattr(jarvis, "_genai_ready", False)
+    jarvis.set_options(dry_run=False)
+
+    assert jarvis.call_groq("a") == "pong"
+    assert jarvis.call_groq("b") == "pong"
+    jarvis.call_gemini("a")
+    jarvis.call_gemini("b")
+    assert created == [jarvis.REQUEST_TIMEOUT]
+    assert configured == ["g"]
+
+
+def test_handle_input_skips_memory_for_short_small_talk(monkeypatch):
+    class FakeCol:
+        def add(self, *a, **kw):
+            raise AssertionError("short turn should not be stored")
+
+        def query(self, *a, **kw):
+            raise AssertionError("short turn should not query memory")
+
+    monkeypatch.setattr(jarvis, "_memory_col", FakeCol())
+    monkeypatch.setattr(jarvis, "SHORT_HISTORY", [])
+    monkeypatch.setattr(jarvis, "MEM_MIN_LEN", 60)
+    monkeypatch.setattr(jarvis, "call_groq", lambda prompt: "hey")
+    assert jarvis.handle_input("hi") == "hey"
+    jarvis.wait_for_memory_writes()
+
+
+def test_query_memories_skips_empty_collection(monkeypatch):
+    class FakeCol:
+        def __init__(self):
+            self.queries = 0
+
+        def count(self):
+            return 0
+
+        def add(self, ids, documents, metadatas):
+            pass
+
+        def query(self, query_texts, n_results, include=None):
+            self.queries += 1
+            return {"documents": [["x"]], "metadatas": [[{}]]}
+
+    fake = FakeCol()
+    monkeypatch.setattr(jarvis, "_memory_col", fake)
+    monkeypatch.setattr(jarvis, "_persist_thread", object())
+    jarvis._reset_mem_count()
+    try:
+        assert jarvis.query_memories("anything").texts == []
+        assert fake.queries == 0
+        jarvis.add_memory("first memory")
+        assert jarvis.query_memories("anything").texts == ["x"]
+        assert fake.queries == 1
+    finally:
+        monkeypatch.undo()
+        jarvis._reset_mem_count()
+
+
+def test_failed_flush_keeps_writes_pending(monkeypatch):
+    class FlakyClient:
+        def __init__(self):
+            self.calls = 0
+
+        def persist(self):
+            self.calls += 1
+            if self.calls == 1:
+                raise OSError("disk busy")
+
+    client = FlakyClient()
+    monkeypatch.setattr(jarvis, "_chroma_client", client)
+    monkeypatch.setattr(jarvis, "_persist_thread", object())
+    monkeypatch.setattr(jarvis, "_dirty_counter", 0)
+    jarvis._mark_dirty(2)
+    jarvis.flush_memories()
+    assert jarvis._dirty_counter == 2
+    jarvis.flush_memories()
+    assert client.calls == 2 and jarvis._dirty_counter == 0
+
+
+def test_handle_input_streams_sentences_to_speech(monkeypatch):
+    spoken = []
+
+    def fake_groq(prompt, on_token=None):
+        for token in ["Hello", " there.", " How are", " you?"]:
+            on_token(token)
+        return "Hello there. How are you?"
+
+    monkeypatch.setattr(jarvis, "call_groq", fake_groq)
+    monkeypatch.setattr(jarvis, "speak", spoken.append)
+    monkeypatch.setattr(jarvis, "SHORT_HISTORY", [])
+    monkeypatch.setattr(jarvis, "MEM_MIN_LEN", 60)
+    out = jarvis.handle_input("hi", stream_speech=True)
+    assert out == "Hello there. How are you?"
+    assert spoken == ["Hello there.", "How are you?"]
+
+
+def test_handle_input_speaks_whole_reply_when_not_streamed(monkeypatch):
+    spoken = []
+    monkeypatch.setattr(jarvis, "call_groq", lambda prompt, on_token=None: "Done.")
+    monkeypatch.setattr(jarvis, "speak", spoken.append)
+    monkeypatch.setattr(jarvis, "SHORT_HISTORY", [])
+    monkeypatch.setattr(jarvis, "MEM_MIN_LEN", 60)
+    jarvis.handle_input("hi", stream_speech=True)
+    assert spoken == ["Done."]
+
+
+def test_long_small_talk_session_stays_on_groq(monkeypatch):
+    routed, retrieved = [], []
+
+    def fake_groq(prompt, on_token=None):
+        routed.append("groq")
+        return "[dry-run] Groq simulated response"
+
+    def fake_gemini(prompt, on_token=None):
+        routed.append("gemini")
+        return "[dry-run] Gemini simulated response"
+
+    monkeypatch.setattr(jarvis, "call_groq", fake_groq)
+    monkeypatch.setattr(jarvis, "call_gemini", fake_gemini)
+    monkeypatch.setattr(jarvis, "_retrieve", lambda text: retrieved.append(text))
+    monkeypatch.setattr(jarvis, "SHORT_HISTORY", jarvis.collections.deque(maxlen=12))
+    monkeypatch.setattr(jarvis, "MEM_MIN_LEN", 60)
+    for _ in range(30):
+        jarvis.handle_input("hi")
+    assert routed == ["groq"] * 30
+    # and the short-turn memory skip still applies late in the session
+    assert retrieved == []
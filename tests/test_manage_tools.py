@@ -35,3 +35,158 @@ def test_export_import_memory(monkeypatch, tmp_path):
     monkeypatch.setattr(jarvis, "_memory_col", fake2)
     jarvis_manage.import_memories(str(out))
     assert any("hello" in d for d in fake2.docs)
+
+
+def test_export_pages_through_collection(monkeypatch, tmp_path):
+    class PagedCol:
+        def __init__(self, n):
+            self.ids = [f"id{i}" for i in range(n)]
+            self.calls = []
+
+        def get(self, limit=None, offset=0, include=None):
+            self.calls.append((limit, offset))
+            ids = self.ids[offset : offset + limit]
+            return {
+                "ids": ids,
+                "documents": [f"doc {i}" for i in ids],
+                "metadatas": [{} for _ in ids],
+            }
+
+    col = PagedCol(5)
+    monkeypatch.setattr(jarvis, "_memory_col", col)
+    monkeypatch.setattr(jarvis_manage, "EXPORT_PAGE_SIZE", 2)
+    out = tmp_path / "mem.json"
+    jarvis_manage.export_memories(str(out))
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert [r["id"] for r in data] == col.ids
+    assert col.calls == [(2, 0), (2, 2), (2, 4)]
+
+
+def test_export_reports_write_and_read_errors(monkeypatch, tmp_path, capsys):
+    import pytest
+
+    class Col:
+        def __init__(self, fail=False):
+            self.fail = fail
+
+        def get(self, limit=None, offset=0, include=None):
+            if self.fail:
+                raise RuntimeError("collection broke")
+            return {"ids": [], "documents": [], "metadatas": []}
+
+    monkeypatch.setattr(jarvis, "_memory_col", Col())
+    # the output directory is missing, so open() itself fails
+    with pytest.raises(SystemExit):
+        jarvis_manage.export_memories(str(tmp_path / "missing" / "mem.json"))
+    assert "Error writing" in capsys.readouterr().out
+
+    monkeypatch.setattr(jarvis, "_memory_col", Col(fail=True))
+    out = tmp_path / "mem.json"
+    with pytest.raises(SystemExit):
+        jarvis_manage.export_memories(str(out))
+    assert "Error reading memories: collection broke" in capsys.readouterr().out
+    assert not list(tmp_path.iterdir())
+
+
+def test_import_batches_adds_and_isolates_bad_records(monkeypatch, tmp_path):
+    class BatchCol:
+        def __init__(self):
+            self.calls = []
+            self.ids = []
+
+        def add(self, ids, documents, metadatas):
+            self.calls.append(len(ids))
+            if "bad" in ids:
+                raise ValueError("bad record")
+            self.ids.extend(ids)
+
+    records = [{"id": f"r{i}", "text": f"t{i}", "meta": {}} for i in range(5)]
+    records[3]["id"] = "bad"
+    src = tmp_path / "mem.json"
+    src.write_text(json.dumps(records), encoding="utf-8")
+
+    col = BatchCol()
+    monkeypatch.setattr(jarvis, "_memory_col", col)
+    monkeypatch.setattr(jarvis_manage, "IMPORT_BATCH_SIZE", 2)
+    jarvis_manage.import_memories(str(src))
+    assert col.ids == ["r0", "r1", "r2", "r4"]
+    # the failing batch is retried one record at a time
+    assert col.calls == [2, 2, 1, 1, 1]
+
+
+def test_import_generates_unique_ids(monkeypatch, tmp_path):
+    class Col:
+        ids = []
+
+        def add(self, ids, documents, metadatas):
+            self.ids.extend(ids)
+
+    src = tmp_path / "mem.json"
+    src.write_text(json.dumps([{"text": "a"}, {"text": "b"}]), encoding="utf-8")
+    col = Col()
+    monkeypatch.setattr(jarvis, "_memory_col", col)
+    jarvis_manage.import_memories(str(src))
+    assert len(set(col.ids)) == 2
+    assert all(i.startswith("imported_") for i in col.ids)
+
+
+def test_import_persists_once_even_when_interrupted(monkeypatch, tmp_path):
+    import pytest
+
+    class Col:
+        ids = []
+
+        def add(self, ids, documents, metadatas):
+            self.ids.extend(ids)
+
+    class Client:
+        persisted = 0
+
+        def persist(self):
+            self.persisted += 1
+
+    def broken_records(f):
+        yield {"id": "a", "text": "a"}
+        yield {"id": "b", "text": "b"}
+        raise ValueError("truncated file")
+
+    src = tmp_path / "mem.json"
+    src.write_text("[]", encoding="utf-8")
+    col, client = Col(), Client()
+    monkeypatch.setattr(jarvis, "_memory_col", col)
+    monkeypatch.setattr(jarvis, "_chroma_client", client)
+    monkeypatch.setattr(jarvis_manage, "IMPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr(jarvis_manage, "_read_records", broken_records)
+    with pytest.raises(ValueError):
+        jarvis_manage.import_memories(str(src))
+    assert col.ids == ["a", "b"] and client.persisted == 1
+
+    # clients without persist() are simply skipped
+    monkeypatch.setattr(jarvis, "_chroma_client", object())
+    monkeypatch.setattr(jarvis_manage, "_read_records", lambda f: [])
+    jarvis_manage.import_memories(str(src))
+
+
+def test_read_records_streams_when_ijson_is_available(monkeypatch):
+    import io
+
+    calls = []
+
+    def fake_items(f, prefix, use_float=False):
+        calls.append((prefix, use_float))
+        return iter(json.load(f))
+
+    monkeypatch.setattr(
+        jarvis_manage,
+        "ijson",
+        type("FakeIjson", (), {"items": staticmethod(fake_items)}),
+    )
+    data = io.BytesIO(json.dumps([{"text": "a", "meta": {"w": 0.5}}]).encode())
+    assert list(jarvis_manage._read_records(data)) == [
+        {"text": "a", "meta": {"w": 0.5}}
+    ]
+    assert calls == [("item", True)]
+
+    monkeypatch.setattr(jarvis_manage, "ijson", None)
+    data.seek(0)
+    assert jarvis_manage._read_records(data) == [{"text": "a", "meta": {"w": 0.5}}]
@@ -29,10 +29,12 @@ def test_get_available_mics_monkeypatch(monkeypatch):
 
     fake = types.SimpleNamespace(PyAudio=lambda: FakePyAudio())
     sys.modules["pyaudio"] = fake
+    jarvis.invalidate_mic_cache()
 
     mics = jarvis.get_available_mics()
     assert len(mics) >= 2
     del sys.modules["pyaudio"]
+    jarvis.invalidate_mic_cache()
 
 
 def test_verify_and_select_prefers_configured(monkeypatch):
@@ -56,9 +58,11 @@ def test_verify_and_select_prefers_configured(monkeypatch):
 
     sys.modules["pyaudio"] = types.SimpleNamespace(PyAudio=lambda: FakePyAudio())
     os.environ["JARVIS_MIC_NAME"] = "USB"
+    jarvis.invalidate_mic_cache()
     idx = jarvis.verify_and_select_mic()
     assert idx == 1
     del sys.modules["pyaudio"]
+    jarvis.invalidate_mic_cache()
     os.environ.pop("JARVIS_MIC_NAME", None)
 
 
@@ -81,7 +85,44 @@ def test_verify_and_select_missing_config(monkeypatch):
 
     sys.modules["pyaudio"] = types.SimpleNamespace(PyAudio=lambda: FakePyAudio())
     os.environ["JARVIS_MIC_NAME"] = "NonExistentMic"
+    jarvis.invalidate_mic_cache()
     idx = jarvis.verify_and_select_mic()
     assert idx == 0
     del sys.modules["pyaudio"]
+    jarvis.invalidate_mic_cache()
     os.environ.pop("JARVIS_MIC_NAME", None)
+
+
+def test_mic_checks_share_one_scan(monkeypatch):
+    created = []
+
+    class FakePyAudio:
+        def __init__(self):
+            created.append(self)
+
+        def get_device_count(self):
+            return 1
+
+        def get_device_info_by_index(self, i):
+            return {"name": "Only Mic", "maxInputChannels": 1}
+
+        def terminate(self):
+            pass
+
+    import sys
+    import types
+
+    monkeypatch.setitem(
+        sys.modules, "pyaudio", types.SimpleNamespace(PyAudio=FakePyAudio)
+    )
+    monkeypatch.delenv("JARVIS_MIC_NAME", raising=False)
+    jarvis.invalidate_mic_cache()
+    try:
+        assert jarvis.check_microphone()
+        assert jarvis.verify_and_select_mic() == 0
+        assert len(created) == 1
+        jarvis.invalidate_mic_cache()
+        jarvis.get_available_mics()
+        assert len(created) == 2
+    finally:
+        jarvis.invalidate_mic_cache()
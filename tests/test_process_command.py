@@ -1,3 +1,4 @@
+import json
 import types
 
 import main
@@ -9,12 +10,16 @@ class DummyResponse:
         self._data = data or {}
         self.text = text
 
+    @property
+    def content(self):
+        return json.dumps(self._data).encode()
+
     def json(self):
         return self._data
 
 
 def test_process_shodan(monkeypatch):
-    monkeypatch.setattr(main, "SHODAN_API_KEY", "FAKE")
+    monkeypatch.setenv("SHODAN_API_KEY", "FAKE")
 
     def fake_get(url, timeout=None):
         return DummyResponse(
@@ -22,7 +27,7 @@ def test_process_shodan(monkeypatch):
             {"ip_str": "8.8.8.8", "org": "Google", "ports": [53]},
         )
 
-    monkeypatch.setattr(main, "requests", types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(main, "_http_get", fake_get)
     output = []
     monkeypatch.setattr(main, "speak", lambda t: output.append(t))
     res = main.process_command("shodan 8.8.8.8")
@@ -31,14 +36,14 @@ def test_process_shodan(monkeypatch):
 
 
 def test_process_weather(monkeypatch):
-    monkeypatch.setattr(main, "OPENWEATHER_API_KEY", "FAKE")
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "FAKE")
 
     def fake_get(url, timeout=None):
         return DummyResponse(
             200, {"weather": [{"description": "cloudy"}], "main": {"temp": 12}}
         )
 
-    monkeypatch.setattr(main, "requests", types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(main, "_http_get", fake_get)
     output = []
     monkeypatch.setattr(main, "speak", lambda t: output.append(t))
     res = main.process_command("weather in Testville")
@@ -50,7 +55,7 @@ def test_process_wikipedia(monkeypatch):
     def fake_get(url, timeout=None):
         return DummyResponse(200, {"extract": "Summary text"})
 
-    monkeypatch.setattr(main, "requests", types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(main, "_http_get", fake_get)
     output = []
     monkeypatch.setattr(main, "speak", lambda t: output.append(t))
     res = main.process_command("wikipedia Python")
@@ -64,3 +69,275 @@ def test_unrecognized(monkeypatch):
     res = main.process_command("something random")
     assert "Command not recognized" in res
     assert output and "Command not recognized" in output[0]
+
+
+def test_compound_command_runs_lookups_concurrently(monkeypatch):
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fake_weather(city):
+        barrier.wait()
+        return f"Weather in {city}: sunny"
+
+    def fake_ipinfo(ip):
+        barrier.wait()
+        return f"IP: {ip}"
+
+    monkeypatch.setattr(main, "weather_lookup", fake_weather)
+    monkeypatch.setattr(main, "ipinfo_lookup", fake_ipinfo)
+    monkeypatch.setattr(main, "speak", lambda t: None)
+    res = main.process_command("weather in Paris and ipinfo 8.8.8.8")
+    assert res == "Weather in paris: sunny\n\nIP: 8.8.8.8"
+
+
+def test_and_inside_argument_is_not_split(monkeypatch):
+    monkeypatch.setattr(main, "weather_lookup", lambda city: f"Weather in {city}")
+    monkeypatch.setattr(main, "speak", lambda t: None)
+    res = main.process_command("weather in Trinidad and Tobago")
+    assert res == "Weather in trinidad and tobago"
+
+
+def test_parse_command_keyword_table_and_free_form():
+    assert main._parse_command("shodan 8.8.8.8") == (main.shodan_lookup, "8.8.8.8")
+    assert main._parse_command("who is ada lovelace") == (
+        main.wiki_lookup,
+        "ada lovelace",
+    )
+    assert main._parse_command("what's the weather in paris") == (
+        main.weather_lookup,
+        "paris",
+    )
+    assert main._parse_command("please ip info 1.2.3.4") == (
+        main.ipinfo_lookup,
+        "1.2.3.4",
+    )
+    fn, msg = main._parse_command("ipinfo please")
+    assert fn is None and "IPv4" in msg
+    assert main._parse_command("who knows") is None
+
+
+def test_main_loop_keeps_listening_during_lookup(monkeypatch):
+    import sys
+    import threading
+
+    import pytest
+
+    release = threading.Event()
+    done = threading.Event()
+    heard = iter(["weather in paris"])
+
+    def fake_listen():
+        try:
+            return next(heard)
+        except StopIteration:
+            # the lookup is still blocked, so the loop did not wait for it
+            assert not done.is_set()
+            release.set()
+            raise KeyboardInterrupt
+
+    def slow_weather(city):
+        release.wait(5)
+        done.set()
+        return f"Weather in {city}"
+
+    monkeypatch.setattr(sys, "argv", ["main.py"])
+    monkeypatch.setattr(main, "listen", fake_listen)
+    monkeypatch.setattr(main, "_start_dns_prewarm", lambda: None)
+    monkeypatch.setattr(main, "_start_background_listener", lambda q: None)
+    monkeypatch.setattr(main, "weather_lookup", slow_weather)
+    monkeypatch.setattr(main, "speak", lambda t: None)
+    with pytest.raises(SystemExit):
+        main.main()
+    assert done.wait(5)
+    # let the worker finish replying before the monkeypatches are undone
+    main._COMMAND_WORKER.submit(lambda: None).result(5)
+
+
+def test_run_single_command_no_audio_silences_speak(monkeypatch, capsys):
+    started = []
+    fake_threading = types.SimpleNamespace(Thread=lambda **kw: started.append(kw))
+    monkeypatch.setattr(main, "threading", fake_threading)
+    res = main.run_single_command("something random", no_audio=True)
+    assert "Command not recognized" in res
+    assert not started
+    assert not main._SPEAK_SUPPRESS.get()
+
+
+def test_import_does_not_load_audio_stack():
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, main; "
+        "assert not {'speech_recognition', 'pyttsx3', 'dotenv'} & set(sys.modules)"
+    )
+    root = os.path.dirname(os.path.abspath(main.__file__))
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+
+
+class FakeMic:
+    def __init__(self, stream=True):
+        self._stream = stream
+        self.stream = None
+
+    def __enter__(self):
+        # like sr.Microphone, a failed open leaves stream None without raising
+        self.stream = object() if self._stream else None
+        return self
+
+    def __exit__(self, *exc):
+        self.stream = None
+
+
+def _fake_sr(recognizer_cls, mic=FakeMic):
+    return types.SimpleNamespace(
+        Recognizer=recognizer_cls,
+        Microphone=mic,
+        UnknownValueError=ValueError,
+        RequestError=RuntimeError,
+        WaitTimeoutError=TimeoutError,
+    )
+
+
+def test_background_listener_queues_recognized_phrases(monkeypatch):
+    import queue
+
+    class FakeRecognizer:
+        def listen(self, source, timeout=None, phrase_time_limit=None):
+            return b"audio"
+
+        def recognize_google(self, audio):
+            return "Weather in Paris"
+
+        def listen_in_background(self, source, callback, phrase_time_limit=None):
+            callback(self, b"audio")
+            return lambda wait_for_stop=True: None
+
+    monkeypatch.setattr(main, "_get_sr", lambda: _fake_sr(FakeRecognizer))
+    commands = queue.Queue()
+    stop = main._start_background_listener(commands)
+    assert callable(stop)
+    assert commands.get_nowait() == "weather in paris"
+
+
+def test_background_listener_needs_an_open_stream(monkeypatch):
+    import queue
+
+    class FakeRecognizer:
+        def listen_in_background(self, source, callback, phrase_time_limit=None):
+            raise AssertionError("should not start on a busy device")
+
+    busy_sr = _fake_sr(FakeRecognizer, mic=lambda: FakeMic(stream=False))
+    monkeypatch.setattr(main, "_get_sr", lambda: busy_sr)
+    assert main._start_background_listener(queue.Queue()) is None
+
+
+def test_background_listener_reports_failures(monkeypatch):
+    import queue
+
+    class FakeRecognizer:
+        def listen(self, source, timeout=None, phrase_time_limit=None):
+            raise OSError("device unplugged")
+
+        def recognize_google(self, audio):
+            raise RuntimeError("offline")
+
+        def listen_in_background(self, source, callback, phrase_time_limit=None):
+            callback(self, b"audio")
+            try:
+                self.listen(source, 1, phrase_time_limit)
+            except OSError:
+                pass  # the real listener thread dies here
+            return lambda wait_for_stop=True: None
+
+    monkeypatch.setattr(main, "_get_sr", lambda: _fake_sr(FakeRecognizer))
+    commands = queue.Queue()
+    main._start_background_listener(commands)
+    # one marker for the RequestError, one for the dead listener thread
+    assert commands.get_nowait() is None and commands.get_nowait() is None
+
+
+def test_main_loop_falls_back_to_listen_when_listener_stops(monkeypatch):
+    import pytest
+
+    stopped = []
+    heard = iter(["exit"])
+
+    def fake_start(commands):
+        commands.put(None)
+        return lambda wait_for_stop=True: stopped.append(wait_for_stop)
+
+    monkeypatch.setattr(main, "_start_dns_prewarm", lambda: None)
+    monkeypatch.setattr(main, "_start_background_listener", fake_start)
+    monkeypatch.setattr(main, "listen", lambda: next(heard))
+    monkeypatch.setattr(main, "speak", lambda t: None)
+    with pytest.raises(SystemExit):
+        main.main([])
+    assert stopped == [False]
+
+
+def test_free_form_keywords_keep_priority_order():
+    # shodan outranks weather even when it appears later in the sentence
+    fn, arg = main._parse_command("check the weather for shodan 8.8.8.8")
+    assert fn is main.shodan_lookup and arg == "8.8.8.8"
+    assert main._parse_command("tell me a joke") is None
+
+
+def test_back_to_back_repeat_is_not_rerun(monkeypatch):
+    calls = []
+
+    def fake_wiki(topic):
+        calls.append(topic)
+        return f"About {topic}"
+
+    monkeypatch.setattr(main, "wiki_lookup", fake_wiki)
+    monkeypatch.setattr(main, "speak", lambda t: None)
+    assert main.process_command("wikipedia python") == "About python"
+    assert main.process_command("Wikipedia Python ") == "About python"
+    assert calls == ["python"]
+
+    monkeypatch.setattr(main, "REPEAT_WINDOW", 0)
+    main.process_command("wikipedia python")
+    assert calls == ["python", "python"]
+
+
+def test_main_accepts_argv_and_reuses_parser(monkeypatch, capsys):
+    monkeypatch.setattr(main, "wiki_lookup", lambda topic: f"About {topic}")
+    main.main(["--no-audio", "-c", "wikipedia rust"])
+    assert "About rust" in capsys.readouterr().out
+    assert main._get_parser() is main._get_parser()
+
+
+def test_no_audio_leaves_speak_binding_untouched(monkeypatch):
+    original = main.speak
+    seen = []
+
+    def spy_process(command):
+        seen.append(main.speak)
+        return "ok"
+
+    monkeypatch.setattr(main, "process_command", spy_process)
+    assert main.run_single_command("anything", no_audio=True) == "ok"
+    assert seen == [original] and main.speak is original
+
+
+def test_ip_verbs_share_one_address(monkeypatch):
+    monkeypatch.setattr(main, "shodan_lookup", lambda ip: f"shodan {ip}")
+    monkeypatch.setattr(main, "ipinfo_lookup", lambda ip: f"ipinfo {ip}")
+    monkeypatch.setattr(main, "speak", lambda t: None)
+    res = main.process_command("shodan and ipinfo 8.8.8.8")
+    assert res == "shodan 8.8.8.8\n\nipinfo 8.8.8.8"
+
+
+def test_exit_requires_the_whole_word(monkeypatch):
+    import pytest
+
+    monkeypatch.setattr(main, "speak", lambda t: None)
+    assert "Command not recognized" in main.process_command("that was quite good")
+    with pytest.raises(SystemExit):
+        main.process_command("please exit")
+    for typed in ("exit.", "quit!"):
+        with pytest.raises(SystemExit):
+            main.process_command(typed)
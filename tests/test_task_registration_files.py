@@ -9,3 +9,20 @@ def test_task_files_exist():
     assert ps.exists(), "PowerShell helper missing"
     content = tmpl.read_text()
     assert "%%PYTHON%%" in content and "%%SCRIPT%%" in content and "%%USER%%" in content
+
+
+def test_setup_env_set_keys_rewrites_once(tmp_path):
+    import importlib.util
+
+    root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location(
+        "setup_jarvis_env", root / "scripts" / "setup_jarvis_env.py"
+    )
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+
+    env = tmp_path / ".env"
+    env.write_text("# keys\nGROQ_API_KEY=old\nOTHER=1\n")
+    mod.set_keys({"GROQ_API_KEY": "new", "IPINFO_TOKEN": "tok"}, env)
+    assert env.read_text() == "# keys\nGROQ_API_KEY=new\nOTHER=1\nIPINFO_TOKEN=tok\n"
+    assert not (tmp_path / ".env.tmp").exists()
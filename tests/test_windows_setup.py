@@ -33,3 +33,75 @@ def test_wakeword_background_triggers(monkeypatch):
     jarvis.start_wakeword_background(fake_on_wake)
     time.sleep(0.1)
     assert events["triggered"]
+
+
+def test_vad_wakeword_loop_only_recognizes_voiced_audio(monkeypatch):
+    import sys
+    import types
+
+    import pytest
+
+    if jarvis.sr is None:
+        pytest.skip("SpeechRecognition not available")
+
+    speech, quiet = b"S" * 640, b"\0" * 640
+
+    calls = []
+
+    class FakeStream:
+        def stop_stream(self):
+            calls.append("stop")
+
+        def start_stream(self):
+            calls.append("start")
+
+        def close(self):
+            calls.append("close")
+
+    class FakePyAudio:
+        def open(self, stream_callback=None, **kwargs):
+            # the trailing frames are still queued when the wake word is heard
+            for frame in [quiet] * 3 + [speech] * 5 + [quiet] * 12 + [speech] * 3:
+                stream_callback(frame, 320, None, None)
+            return FakeStream()
+
+        def terminate(self):
+            pass
+
+    fake_pyaudio = types.SimpleNamespace(PyAudio=FakePyAudio, paInt16=8, paContinue=0)
+    monkeypatch.setitem(sys.modules, "pyaudio", fake_pyaudio)
+    jarvis.invalidate_mic_cache()
+
+    class FakeVad:
+        def __init__(self, mode):
+            pass
+
+        def is_speech(self, frame, rate):
+            return frame[:1] == b"S"
+
+    monkeypatch.setattr(
+        jarvis, "webrtcvad", types.SimpleNamespace(Vad=FakeVad), raising=False
+    )
+
+    heard = []
+
+    class FakeRecognizer:
+        def recognize_google(self, audio):
+            heard.append(audio.get_raw_data())
+            return "hey Jarvis"
+
+    monkeypatch.setattr(jarvis, "_recognizer", FakeRecognizer())
+
+    stop = threading.Event()
+
+    def on_wake():
+        calls.append("wake")
+        stop.set()
+
+    assert jarvis._vad_wakeword_loop(stop, on_wake)
+    assert stop.is_set()
+    # leading silence is never sent to STT
+    assert len(heard) == 1 and heard[0].startswith(speech)
+    # capture pauses while the command uses the mic; queued audio is dropped
+    assert calls == ["stop", "wake", "start", "stop", "close"]
+    jarvis.invalidate_mic_cache()
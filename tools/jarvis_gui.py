@@ -16,12 +16,15 @@ Note: This GUI is designed for Windows, but will run on other OSes with limited
 from __future__ import annotations
 
 import os
-import queue
+import re
+import selectors
+import shutil
 import subprocess
 import sys
 import threading
 import time
 import tkinter as tk
+from collections import deque
 from pathlib import Path
 from tkinter import messagebox, ttk
 from tkinter.scrolledtext import ScrolledText
@@ -40,10 +43,44 @@ ENV_FILE = REPO_ROOT / ".env"
 JARVIS_SCRIPT = REPO_ROOT / "jarvis.py"
 PY = sys.executable
 
-LOG_QUEUE: "queue.Queue[str]" = queue.Queue()
+# bounded so a runaway child can't grow the GUI's memory without limit:
+# entries are single lines cut to LOG_LINE_MAX chars, so the buffer holds at
+# most LOG_QUEUE_MAX * LOG_LINE_MAX chars. deque extend/popleft are atomic, so
+# producers and the Tk poll need no lock; maxlen evicts the oldest lines once
+# the GUI falls behind
+LOG_QUEUE_MAX = 8192
+LOG_LINE_MAX = 2000
+# most lines one poll hands to the widget; the rest wait for the next tick
+LOG_DRAIN_MAX = 1000
+LOG_DEQUE: "deque[str]" = deque(maxlen=LOG_QUEUE_MAX)
+_dropped_lines = 0  # approximate: concurrent producers may race the count
+_last_drop_note = 0.0
 PROCESS: subprocess.Popen | None = None
-PROCESS_LOCK = threading.Lock()
-STOP_READER = threading.Event()
+PROCESS_LOCK = threading.Lock()  # guards start/stop transitions only
+# stop flag for the current child's reader; each child gets a fresh one so a
+# finishing reader can never stop its successor
+READER_STOP: threading.Event | None = None
+# lifecycle state readable without the lock; stopping happens on a worker
+# thread so nothing holds PROCESS_LOCK across terminate()/wait()
+RUNNING = threading.Event()
+STOPPING = threading.Event()
+
+# read the child's output through a 64 KiB buffer rather than the 8 KiB default
+PIPE_BUFSIZE = 64 * 1024
+
+# give the child this long to exit after terminate() before killing it
+STOP_GRACE_SECONDS = 1.0
+STOP_POLL_SECONDS = 0.05
+
+# device probes open real hardware; reuse a result for this many seconds
+DEVICE_CHECK_TTL = 5.0
+
+# the log widget keeps only the newest lines so it stays fast over long uptimes
+LOG_MAX_LINES = 5000
+
+# log polling speeds up while output is flowing and backs off when idle
+LOG_POLL_MIN_MS = 20
+LOG_POLL_MAX_MS = 250
 
 # -------------------------
 # Utilities
@@ -51,25 +88,75 @@ STOP_READER = threading.Event()
 
 
 def append_log(text: str) -> None:
-    LOG_QUEUE.put(text)
+    _append_lines(text.split("\n"))
 
 
-def set_env_key(key: str, value: str) -> None:
-    """Set or replace a key=value in .env file (create if missing)."""
+def _append_lines(lines: list[str]) -> None:
+    global _dropped_lines
+    lines = [
+        line if len(line) <= LOG_LINE_MAX else line[:LOG_LINE_MAX] + " ..."
+        for line in lines
+    ]
+    overflow = len(LOG_DEQUE) + len(lines) - LOG_QUEUE_MAX
+    if overflow > 0:
+        _dropped_lines += overflow
+    LOG_DEQUE.extend(lines)
+
+
+def drain_log_queue(limit: int | None = None) -> list[str]:
+    """Take up to `limit` pending log lines (default LOG_DRAIN_MAX), oldest first.
+
+    Overflow is noted at most once a second.
+    """
+    global _dropped_lines, _last_drop_note
+    n = min(len(LOG_DEQUE), LOG_DRAIN_MAX if limit is None else limit)
+    items = [LOG_DEQUE.popleft() for _ in range(n)]
+    if _dropped_lines:
+        now = time.monotonic()
+        if now - _last_drop_note >= 1.0:
+            items.insert(0, f"... {_dropped_lines} log lines dropped ...")
+            _dropped_lines = 0
+            _last_drop_note = now
+    return items
+
+
+def next_poll_delay(current_ms: int, drained: int) -> int:
+    """Delay before the next log poll: fast after output, doubling when idle."""
+    if drained:
+        return LOG_POLL_MIN_MS
+    return min(LOG_POLL_MAX_MS, max(LOG_POLL_MIN_MS, current_ms * 2))
+
+
+_KEY_RE_CACHE: dict[str, re.Pattern] = {}
+
+
+def _key_pattern(key: str) -> re.Pattern:
+    pattern = _KEY_RE_CACHE.get(key)
+    if pattern is None:
+        pattern = _KEY_RE_CACHE[key] = re.compile(rf"(?m)^{re.escape(key)}=.*$")
+    return pattern
+
+
+def set_env_keys(values: dict[str, str]) -> None:
+    """Set or replace several key=value pairs in .env with one atomic write."""
     ENV_FILE.parent.mkdir(parents=True, exist_ok=True)
     text = ENV_FILE.read_text() if ENV_FILE.exists() else ""
-    lines = text.splitlines()
-    out = []
-    replaced = False
-    for line in lines:
-        if line.startswith(key + "="):
-            out.append(f"{key}={value}")
-            replaced = True
-        else:
-            out.append(line)
-    if not replaced:
-        out.append(f"{key}={value}")
-    ENV_FILE.write_text("\n".join(out) + "\n")
+    if text and not text.endswith("\n"):
+        text += "\n"
+    for key, value in values.items():
+        line = f"{key}={value}"
+        # a function replacement keeps backslashes in values (Windows paths) literal
+        text, count = _key_pattern(key).subn(lambda _m: line, text)
+        if not count:
+            text += line + "\n"
+    tmp = ENV_FILE.with_name(ENV_FILE.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, ENV_FILE)
+
+
+def set_env_key(key: str, value: str) -> None:
+    """Set or replace a key=value in .env file (create if missing)."""
+    set_env_keys({key: value})
 
 
 # -------------------------
@@ -77,63 +164,169 @@ def set_env_key(key: str, value: str) -> None:
 # -------------------------
 
 
+def _child_command() -> tuple[list[str], dict[str, str]]:
+    """Command line and environment that keep the child's output unbuffered."""
+    cmd = [PY, "-u", str(JARVIS_SCRIPT), "--background", "--wake-word"]
+    # -u only covers Python's own streams; C libraries writing through stdio
+    # still block-buffer on a pipe unless stdbuf switches them to line mode.
+    # Linux only: elsewhere (e.g. MSYS stdbuf.exe on Windows) the wrapper would
+    # become the tracked process and terminate() could orphan the real child.
+    stdbuf = shutil.which("stdbuf") if sys.platform.startswith("linux") else None
+    if stdbuf:
+        cmd = [stdbuf, "-oL", "-eL", *cmd]
+    env = {**os.environ, "PYTHONUNBUFFERED": "1", "PYTHONIOENCODING": "utf-8"}
+    return cmd, env
+
+
+def is_jarvis_running() -> bool:
+    """Lock-free status check for the UI."""
+    return RUNNING.is_set()
+
+
 def start_jarvis_process() -> None:
-    global PROCESS, STOP_READER
+    global PROCESS, READER_STOP
     with PROCESS_LOCK:
+        if STOPPING.is_set():
+            append_log("Jarvis is still stopping; try again in a moment.")
+            return
         if PROCESS is not None and PROCESS.poll() is None:
             append_log("Jarvis already running.")
             return
         if not JARVIS_SCRIPT.exists():
             append_log("jarvis.py not found in repository root.")
             return
-        cmd = [PY, "-u", str(JARVIS_SCRIPT), "--background", "--wake-word"]
+        cmd, env = _child_command()
         append_log(f"Starting Jarvis: {cmd}")
-        STOP_READER.clear()
         PROCESS = subprocess.Popen(
             cmd,
             cwd=str(REPO_ROOT),
+            env=env,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            bufsize=1,
-            text=True,
+            bufsize=PIPE_BUFSIZE,
         )
+        READER_STOP = threading.Event()
+        RUNNING.set()
         threading.Thread(
-            target=_reader_thread, args=(PROCESS.stdout,), daemon=True
+            target=_reader_thread,
+            args=(PROCESS.stdout, PROCESS, READER_STOP),
+            daemon=True,
         ).start()
 
 
-def stop_jarvis_process() -> None:
-    global PROCESS, STOP_READER
+def stop_jarvis_process(wait: bool = False) -> None:
+    """Begin stopping Jarvis; pass wait=True to block until it has exited."""
+    global PROCESS, READER_STOP
     with PROCESS_LOCK:
-        if PROCESS is None or PROCESS.poll() is not None:
+        if STOPPING.is_set():
+            worker = None
+        elif PROCESS is None or PROCESS.poll() is not None:
             append_log("Jarvis is not running.")
-            PROCESS = None
+            if READER_STOP is not None:
+                READER_STOP.set()
+            PROCESS = READER_STOP = None
+            RUNNING.clear()
             return
-        append_log("Stopping Jarvis process...")
+        else:
+            append_log("Stopping Jarvis process...")
+            STOPPING.set()
+            worker = threading.Thread(
+                target=_stop_worker, args=(PROCESS, READER_STOP), daemon=True
+            )
+            worker.start()
+    if wait:
+        if worker is not None:
+            worker.join()
+        else:
+            while STOPPING.is_set():
+                time.sleep(0.05)
+
+
+def _stop_worker(
+    proc: subprocess.Popen, reader_stop: threading.Event | None = None
+) -> None:
+    global PROCESS, READER_STOP
+    try:
+        proc.terminate()
+        deadline = time.monotonic() + STOP_GRACE_SECONDS
+        while proc.poll() is None and time.monotonic() < deadline:
+            time.sleep(STOP_POLL_SECONDS)
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        append_log("Jarvis stopped.")
+    except Exception:
         try:
-            PROCESS.terminate()
-            PROCESS.wait(timeout=5)
-            append_log("Jarvis stopped.")
+            proc.kill()
         except Exception:
-            try:
-                PROCESS.kill()
-            except Exception:
-                pass
-        finally:
-            STOP_READER.set()
-            PROCESS = None
+            pass
+    finally:
+        if reader_stop is not None:
+            reader_stop.set()
+        with PROCESS_LOCK:
+            if PROCESS is proc:
+                PROCESS = READER_STOP = None
+                RUNNING.clear()
+            STOPPING.clear()
+
+
+def _decode_lines(data: bytes) -> list[str]:
+    return data.decode("utf-8", errors="replace").splitlines()
+
 
+def _read_chunks(pipe, stop: threading.Event | None = None):
+    """Yield raw output chunks from `pipe` until EOF.
 
-def _reader_thread(pipe) -> None:
+    Where pipes can be polled (not Windows) the fd is watched with a selector
+    and read with os.read, waking every 100 ms to honour `stop` even if the
+    child never closes its end.
+    """
     try:
-        for line in iter(pipe.readline, ""):
-            if not line:
-                break
-            append_log(line.rstrip("\n"))
+        fd = pipe.fileno()
+    except (AttributeError, OSError, ValueError):
+        fd = None
+    if fd is None or os.name == "nt":
+        while True:
+            chunk = pipe.read1(PIPE_BUFSIZE)
+            if not chunk:
+                return
+            yield chunk
+    with selectors.DefaultSelector() as sel:
+        sel.register(fd, selectors.EVENT_READ)
+        while stop is None or not stop.is_set():
+            if not sel.select(timeout=0.1):
+                continue
+            chunk = os.read(fd, PIPE_BUFSIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _reader_thread(
+    pipe,
+    proc: subprocess.Popen | None = None,
+    stop: threading.Event | None = None,
+) -> None:
+    # read whatever is available in binary chunks and decode complete lines
+    # once per chunk; a partial last line waits for the next chunk
+    tail = b""
+    try:
+        for chunk in _read_chunks(pipe, stop):
+            complete, sep, tail = (tail + chunk).rpartition(b"\n")
+            if sep:
+                _append_lines(_decode_lines(complete))
+            if len(tail) > PIPE_BUFSIZE:
+                # a child that never writes a newline must not grow `tail`
+                _append_lines(_decode_lines(tail))
+                tail = b""
+        if tail:
+            _append_lines(_decode_lines(tail))
     except Exception:
         append_log("Reader thread encountered an error.")
     finally:
-        STOP_READER.set()
+        # the pipe closes when the child exits on its own
+        if proc is not None and PROCESS is proc:
+            RUNNING.clear()
 
 
 # -------------------------
@@ -149,11 +342,18 @@ def _create_image() -> Image.Image:
     return img
 
 
+# drawn once at import so minimizing doesn't pay for PIL on the Tk thread
+_TRAY_IMAGE = _create_image() if pystray is not None else None
+
+
 class JarvisGUI:
     def __init__(self, root: tk.Tk):
         self.root = root
         root.title("Jarvis Control")
         root.geometry("700x500")
+        self._dev_cache: tuple[float, bool, bool] | None = None
+        self._probing = False
+        self._log_lines = 0
         self._build()
         self._start_log_updater()
         self.tray_icon = None
@@ -226,8 +426,34 @@ class JarvisGUI:
         self.check_devices()
 
     def check_devices(self):
-        mic = jarvis.check_microphone()
-        cam = jarvis.check_camera()
+        # probing opens audio/video devices, so it runs off the Tk thread and
+        # a recent result is reused; overlapping clicks share one probe
+        cached = self._dev_cache
+        if cached and time.monotonic() - cached[0] < DEVICE_CHECK_TTL:
+            self._apply_status(cached[1], cached[2])
+            return
+        if self._probing:
+            return
+        self._probing = True
+        threading.Thread(target=self._probe_devices, daemon=True).start()
+
+    def _probe_devices(self):
+        mic = cam = False
+        try:
+            # the device list is cached for the whole process; rescan so a
+            # mic plugged in since the last probe shows up
+            jarvis.invalidate_mic_cache()
+            mic = jarvis.check_microphone()
+            cam = jarvis.check_camera()
+        finally:
+            self.root.after(0, self._finish_probe, mic, cam)
+
+    def _finish_probe(self, mic: bool, cam: bool):
+        self._dev_cache = (time.monotonic(), mic, cam)
+        self._probing = False
+        self._apply_status(mic, cam)
+
+    def _apply_status(self, mic: bool, cam: bool):
         self._set_status(self.mic_status, "Mic", mic)
         self._set_status(self.cam_status, "Cam", cam)
 
@@ -238,35 +464,45 @@ class JarvisGUI:
             label.config(text=f"{name}: Missing", foreground="red")
 
     def save_keys(self):
-        g = self.groq_var.get().strip()
-        gg = self.google_var.get().strip()
-        if g:
-            set_env_key("GROQ_API_KEY", g)
-            append_log("Saved GROQ_API_KEY to .env")
-        if gg:
-            set_env_key("GOOGLE_API_KEY", gg)
-            append_log("Saved GOOGLE_API_KEY to .env")
+        entered = {
+            "GROQ_API_KEY": self.groq_var.get().strip(),
+            "GOOGLE_API_KEY": self.google_var.get().strip(),
+        }
+        values = {key: value for key, value in entered.items() if value}
+        if values:
+            set_env_keys(values)
+            for key in values:
+                append_log(f"Saved {key} to .env")
         messagebox.showinfo("Saved", "Keys saved to .env")
 
-    def append_log(self, text: str):
+    def append_log(self, lines: list[str]):
+        # one state toggle pair, insert and scroll per batch; the line count
+        # is tracked here so trimming needs no extra index() round-trip.
+        # Count newlines too, in case an entry holds more than one line.
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, text + "\n")
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        self._log_lines += sum(entry.count("\n") + 1 for entry in lines)
+        if self._log_lines > LOG_MAX_LINES:
+            excess = self._log_lines - LOG_MAX_LINES
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self._log_lines = LOG_MAX_LINES
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
 
     def _start_log_updater(self):
+        self._poll_ms = LOG_POLL_MIN_MS
+
         def poll():
+            items = []
             try:
-                while True:
-                    try:
-                        s = LOG_QUEUE.get_nowait()
-                    except queue.Empty:
-                        break
-                    self.append_log(s)
+                items = drain_log_queue()
+                if items:
+                    self.append_log(items)
             finally:
-                self.root.after(200, poll)
+                self._poll_ms = next_poll_delay(self._poll_ms, len(items))
+                self.root.after(self._poll_ms, poll)
 
-        self.root.after(200, poll)
+        self.root.after(self._poll_ms, poll)
 
     def minimize_to_tray(self):
         if pystray is None:
@@ -275,23 +511,26 @@ class JarvisGUI:
                 "pystray or pillow not installed; cannot minimize to tray.",
             )
             return
-        # hide window and create tray icon
+        # hide window; the tray icon and its thread are created once and
+        # then just shown/hidden on later minimizes
         self.root.withdraw()
-        image = _create_image()
+        if self.tray_icon is not None:
+            self.tray_icon.visible = True
+            return
 
         def on_show(icon, item):
+            icon.visible = False
             self.root.after(0, self.root.deiconify)
-            icon.stop()
 
         def on_quit(icon, item):
-            stop_jarvis_process()
+            stop_jarvis_process(wait=True)
             icon.stop()
             self.root.after(0, self.root.quit)
 
         menu = pystray.Menu(
             pystray.MenuItem("Show", on_show), pystray.MenuItem("Quit", on_quit)
         )
-        icon = pystray.Icon("jarvis", image, "Jarvis", menu)
+        icon = pystray.Icon("jarvis", _TRAY_IMAGE, "Jarvis", menu)
         self.tray_icon = icon
         threading.Thread(target=icon.run, daemon=True).start()
 
@@ -301,7 +540,9 @@ class JarvisGUI:
 
     def on_close(self):
         # stop background process if running
-        stop_jarvis_process()
+        stop_jarvis_process(wait=True)
+        if self.tray_icon is not None:
+            self.tray_icon.stop()
         self.root.destroy()
 
 
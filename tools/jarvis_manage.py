@@ -11,12 +11,53 @@ This script uses the project's Chroma collection if available.
 from __future__ import annotations
 
 import argparse
+import contextlib
+import itertools
 import json
+import os
 import sys
+import time
 from typing import Any
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 import jarvis
 
+EXPORT_PAGE_SIZE = 1000
+
+
+def _iter_memory_records(col):
+    """Yield export records page by page so memory use stays bounded."""
+    offset = 0
+    while True:
+        try:
+            page = col.get(
+                limit=EXPORT_PAGE_SIZE,
+                offset=offset,
+                include=["documents", "metadatas"],
+            )
+        except TypeError:
+            # collection without paging support: fetch everything once
+            if offset:
+                raise
+            page = col.get()
+            offset = None
+        ids = page.get("ids", [])
+        for i, d, m in zip(ids, page.get("documents", []), page.get("metadatas", [])):
+            yield {"id": i, "text": d, "meta": m}
+        if offset is None or len(ids) < EXPORT_PAGE_SIZE:
+            return
+        offset += len(ids)
+
+
+def _discard(path: str) -> None:
+    # the partial file may never have been created
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
 
 def export_memories(out_path: str) -> None:
     col = getattr(jarvis, "_memory_col", None)
@@ -26,36 +67,79 @@ def export_memories(out_path: str) -> None:
         )
         sys.exit(2)
 
-    # Query all known memories (Chroma doesn't provide a direct "all" query API uniformly,
-    # so rely on the collection's internal API if available: list() or get() methods.
-    try:
-        if hasattr(col, "get"):
-            # Some versions provide .get() to fetch all
-            all_items = col.get()
-            docs = all_items.get("documents", [])
-            metas = all_items.get("metadatas", [])
-            ids = all_items.get("ids", [])
-            records = []
-            for i, d, m in zip(ids, docs, metas):
-                records.append({"id": i, "text": d, "meta": m})
-        elif hasattr(col, "peek"):
-            # fallback to peek(n) pattern if present
+    # Chroma's get() pages with limit/offset; records are streamed into the
+    # JSON array as they arrive instead of materialising the whole collection.
+    if hasattr(col, "get"):
+        records = _iter_memory_records(col)
+    elif hasattr(col, "peek"):
+        # fallback to peek(n) pattern if present
+        try:
             recs = col.peek(n=10000)
-            records = [{"id": r[0], "text": r[1], "meta": r[2]} for r in recs]
-        else:
-            # Last resort: no public API; warn and exit
-            print(
-                "Chroma collection does not expose a compatible export API in this environment."
-            )
-            sys.exit(3)
+        except Exception as e:
+            print("Error reading memories:", e)
+            sys.exit(4)
+        records = ({"id": r[0], "text": r[1], "meta": r[2]} for r in recs)
+    else:
+        # Last resort: no public API; warn and exit
+        print(
+            "Chroma collection does not expose a compatible export API in this environment."
+        )
+        sys.exit(3)
+
+    count = 0
+    tmp_path = out_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for rec in records:
+                f.write(",\n  " if count else "\n  ")
+                f.write(json.dumps(rec, ensure_ascii=False))
+                count += 1
+            f.write("\n]\n" if count else "]\n")
+    except OSError as e:
+        # opening or writing the output (e.g. its directory doesn't exist)
+        print(f"Error writing {out_path}:", e)
+        _discard(tmp_path)
+        sys.exit(4)
     except Exception as e:
         print("Error reading memories:", e)
+        _discard(tmp_path)
         sys.exit(4)
+    os.replace(tmp_path, out_path)
+
+    print(f"Exported {count} memory records to {out_path}")
+
+
+IMPORT_BATCH_SIZE = 512
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
 
-    print(f"Exported {len(records)} memory records to {out_path}")
+def _read_records(f):
+    """Iterate the records of an export file opened in binary mode.
+
+    With ijson installed records are parsed one at a time, so memory stays
+    proportional to a batch rather than to the whole file.
+    """
+    if ijson is not None:
+        return ijson.items(f, "item", use_float=True)
+    return json.load(f)
+
+
+def _add_batch(col, batch: list[tuple[str, Any, dict]]) -> int:
+    """Add a batch in one call; if that fails, retry record by record."""
+    ids, docs, metas = (list(field) for field in zip(*batch))
+    try:
+        col.add(ids=ids, documents=docs, metadatas=metas)
+        return len(ids)
+    except Exception:
+        pass
+    added = 0
+    for _id, text, meta in batch:
+        try:
+            col.add(ids=[_id], documents=[text], metadatas=[meta])
+            added += 1
+        except Exception as e:
+            print("Failed to add record", _id, e)
+    return added
 
 
 def import_memories(in_path: str) -> None:
@@ -66,24 +150,35 @@ def import_memories(in_path: str) -> None:
         )
         sys.exit(2)
 
-    with open(in_path, "r", encoding="utf-8") as f:
-        records = json.load(f)
-
-    for rec in records:
-        _id = rec.get("id") or f"imported_{int(time.time()*1000)}"
-        text = rec.get("text")
-        meta = rec.get("meta") or {}
-        try:
-            col.add(ids=[_id], documents=[text], metadatas=[meta])
-        except Exception as e:
-            print("Failed to add record", _id, e)
-
+    # ids for records without one: a per-run prefix plus a counter never collide
+    run = time.monotonic_ns()
+    counter = itertools.count()
+    seen = 0
+    added = 0
+    batch: list[tuple[str, Any, dict]] = []
+    # newer Chroma clients write through and have no persist(); older ones and
+    # the FAISS store are flushed once, even if the import stops part way
+    persist = getattr(jarvis._chroma_client, "persist", None)
     try:
-        jarvis._chroma_client.persist()
-    except Exception:
-        pass
-
-    print(f"Imported {len(records)} memory records from {in_path}")
+        with open(in_path, "rb") as f:
+            for rec in _read_records(f):
+                seen += 1
+                _id = rec.get("id") or f"imported_{run}_{next(counter)}"
+                batch.append((_id, rec.get("text"), rec.get("meta") or {}))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    added += _add_batch(col, batch)
+                    batch = []
+        if batch:
+            added += _add_batch(col, batch)
+    finally:
+        jarvis._bump_mem_count(added)
+        if persist is not None:
+            try:
+                persist()
+            except Exception as e:
+                print(f"Failed to persist imported memories: {e}")
+
+    print(f"Imported {seen} memory records from {in_path}")
 
 
 def main(argv: list[str] | None = None) -> None: